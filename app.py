@@ -1,7 +1,17 @@
 # app.py
+import csv
+import io
+import os
+import time
+from collections import Counter
 import streamlit as st
 import spacy
 from spacy import displacy
+from spacy.attrs import DEP, IS_ALPHA, IS_STOP, LEMMA, ORTH, POS, SHAPE, TAG
+from batch_tagger import detect_format, iter_file_records
+from doc_cache import DocCache
+from food_index import FoodIndex
+from pipeline_timing import PipelineTimer
 from filipino_food_config import (
     FilipinoFoodNER, 
     FILIPINO_FOODS, 
@@ -19,19 +29,52 @@ st.set_page_config(
 
 # Load model just once using caching
 @st.cache_resource
-def load_filipino_food_model():
-    """Load the Filipino Food NER model with caching."""
-    ner_model = FilipinoFoodNER()
+def load_filipino_food_model(profile="full"):
+    """Load the Filipino Food NER model with caching (one pipeline per profile)."""
+    ner_model = FilipinoFoodNER(profile=profile)
     return ner_model.load_model_with_ruler()
 
+@st.cache_resource
+def get_pipeline_timer(profile="full"):
+    """Timing wrapper around the pipeline for the sidebar Performance panel."""
+    return PipelineTimer(load_filipino_food_model(profile))
+
+@st.cache_resource
+def get_doc_cache(profile="full"):
+    """Shared LRU cache of processed Docs so reruns and repeat texts skip the pipeline."""
+    nlp = get_pipeline_timer(profile)
+    model_version = FilipinoFoodNER(profile=profile).pipeline_fingerprint()
+    return DocCache(nlp, model_version, max_entries=256)
+
+@st.cache_resource(max_entries=16)
+def get_token_table(doc_key, _doc):
+    """Token table for a Doc, built once per cache key and reused across reruns and page changes."""
+    return build_token_table(_doc)
+
+@st.cache_resource(max_entries=4)
+def get_food_index(path, manifest_mtime_ns):
+    """
+    Open a food mention index once per manifest version; postings stay memory-mapped across reruns.
+    Keying on the manifest's mtime gives every session a fresh, never-mutated FoodIndex after an add.
+    """
+    return FoodIndex(path)
+
 @st.cache_resource  
 def get_sample_texts():
     """Get sample texts for testing."""
     ner_model = FilipinoFoodNER()
     return ner_model.get_sample_texts()
 
+# Cheapest profile that still finds every entity type the app shows;
+# the full pipeline is only needed for the token table (POS, tags, lemmas, deps)
+LIGHT_PROFILE = "foods+ner"
+FULL_PROFILE = "full"
+
+# Upload mode: rows per nlp.pipe batch and rows per table page
+UPLOAD_BATCH_SIZE = 64
+PAGE_SIZE = 50
+
 # Initialize the model
-nlp = load_filipino_food_model()
 sample_texts = get_sample_texts()
 
 # Main app
@@ -40,7 +83,24 @@ def main():
     st.markdown(f"*{APP_CONFIG['description']}*")
     
     # Sidebar
-    setup_sidebar()
+    show_token_table = setup_sidebar()
+    profile = FULL_PROFILE if show_token_table else LIGHT_PROFILE
+    doc_cache = get_doc_cache(profile)
+    timer = get_pipeline_timer(profile)
+    
+    mode = st.radio("Input", ["Single text", "Upload file", "Search index"], horizontal=True, label_visibility="collapsed")
+    if mode == "Search index":
+        search_food_index()
+        display_performance_panel(timer, st.session_state.get("last_timing"))
+        return
+    if mode == "Upload file":
+        # Uploads only need entities, so they always use the light pipeline
+        upload_timer = get_pipeline_timer(LIGHT_PROFILE)
+        analyze_upload(get_doc_cache(LIGHT_PROFILE), upload_timer)
+        upload = st.session_state.get("upload_results")
+        display_performance_panel(upload_timer, upload["timing"] if upload else None,
+                                  title="Last upload", empty_hint="Tag a file to see per-component timings.")
+        return
     
     # Main content
     col1, col2 = st.columns([2, 1])
@@ -58,7 +118,7 @@ def main():
         st.subheader("Entity Types Detected")
         if user_input.strip():
             # Quick preview of all entity types
-            doc_preview = nlp(user_input)
+            doc_preview = process_text(doc_cache, timer, user_input)
             entity_types = set(ent.label_ for ent in doc_preview.ents)
             
             if entity_types:
@@ -102,18 +162,201 @@ def main():
         </style>
     """, unsafe_allow_html=True)
     
-    # Analysis button
+    # Analysis button; the results stay up across reruns (e.g. paging the token table) until the text changes
     if st.button("🔍 Analyze Text", use_container_width=True):
-        analyze_text(user_input)
+        st.session_state["analyzed_text"] = user_input
+        analyze_text(doc_cache, user_input, show_token_table)
+    elif user_input.strip() and st.session_state.get("analyzed_text") == user_input:
+        analyze_text(doc_cache, user_input, show_token_table)
+    
+    display_performance_panel(timer, st.session_state.get("last_timing"))
+
+def tag_uploaded_file(nlp, uploaded_file, fmt, text_field, progress):
+    """
+    Stream the rows of an uploaded file through nlp.pipe and aggregate as they arrive.
+    Only entity offsets and row texts are kept, never the Docs themselves. When nlp is
+    a PipelineTimer, the per-component times of every batch are summed into "timing".
+    """
+    uploaded_file.seek(0)
+    reader = io.TextIOWrapper(uploaded_file, encoding="utf-8", newline="")
+    records = iter_file_records(reader, fmt, text_field, tsv=uploaded_file.name.lower().endswith(".tsv"))
+    
+    rows = []
+    entity_rows = []
+    food_counts = Counter()
+    label_counts = Counter()
+    total_bytes = max(uploaded_file.size, 1)
+    timing = {"docs": 0, "tokens": 0, "total_ms": 0.0, "components_ms": Counter()}
+    last_batch = None
+    start = time.perf_counter()
+    for doc, record_id in nlp.pipe(records, as_tuples=True, batch_size=UPLOAD_BATCH_SIZE):
+        batch = nlp.last() if isinstance(nlp, PipelineTimer) else None
+        if batch is not None and batch is not last_batch:
+            # A new breakdown is recorded per batch, before its first Doc is yielded
+            last_batch = batch
+            timing["docs"] += batch["docs"]
+            timing["tokens"] += sum(batch["tokens_per_doc"])
+            timing["total_ms"] += batch["total_ms"]
+            timing["components_ms"].update(batch["components_ms"])
+        row_index = len(rows)
+        rows.append({"id": record_id, "text": doc.text})
+        for ent in doc.ents:
+            entity_rows.append({"Row": row_index, "ID": record_id, "Entity": ent.text, "Label": ent.label_,
+                                "Start": ent.start_char, "End": ent.end_char})
+            label_counts[ent.label_] += 1
+            if ent.label_ == "FILIPINO_FOOD":
+                food_counts[ent.ent_id_ or ent.text] += 1
+        if len(rows) % UPLOAD_BATCH_SIZE == 0:
+            progress.progress(min(uploaded_file.tell() / total_bytes, 1.0), text=f"Tagged {len(rows)} rows...")
+    progress.progress(1.0, text=f"Tagged {len(rows)} rows")
+    timing["wall_ms"] = (time.perf_counter() - start) * 1000
+    timing["components_ms"] = dict(timing["components_ms"])
+    # Detach so closing the wrapper doesn't close the uploaded file, which later reruns reuse
+    reader.detach()
+    
+    return {"rows": rows, "entities": entity_rows, "food_counts": food_counts, "label_counts": label_counts,
+            "timing": timing}
+
+def paginate(items, key, page_size=PAGE_SIZE):
+    """Return only the slice of items for the page picked with a number input."""
+    n_pages = max(1, -(-len(items) // page_size))
+    page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, key=key)
+    start = (page - 1) * page_size
+    return items[start:start + page_size]
 
-def analyze_text(user_input):
+def analyze_upload(doc_cache, timer):
+    """Upload mode: tag a CSV/TSV/TXT/JSONL file and browse the results page by page."""
+    import pandas as pd
+    
+    uploaded_file = st.file_uploader(
+        "Upload a file",
+        type=["csv", "tsv", "txt", "jsonl", "ndjson"],
+        help="CSV/JSONL: one document per row in the text column. TXT: one document per line."
+    )
+    if uploaded_file is None:
+        st.info("Upload a file to tag every row with the Filipino food recognizer.")
+        return
+    
+    fmt = detect_format(uploaded_file.name)
+    text_field = "text"
+    if fmt in ("csv", "jsonl"):
+        text_field = st.text_input("Text column / field", value="text")
+    
+    upload_key = (uploaded_file.file_id, text_field)
+    if st.button("🔍 Tag File", use_container_width=True):
+        progress = st.progress(0.0, text="Starting...")
+        try:
+            results = tag_uploaded_file(timer, uploaded_file, fmt, text_field, progress)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            st.error(f"Could not read the file as {fmt.upper()}: {e}")
+            return
+        st.session_state["upload_results"] = dict(results, key=upload_key)
+    
+    results = st.session_state.get("upload_results")
+    if not results or results["key"] != upload_key:
+        return
+    
+    rows, entity_rows = results["rows"], results["entities"]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Rows", len(rows))
+    with col2:
+        st.metric("Entities", len(entity_rows))
+    with col3:
+        st.metric("Filipino Foods", sum(results["food_counts"].values()))
+    with col4:
+        st.metric("Unique Dishes", len(results["food_counts"]))
+    
+    tab1, tab2, tab3 = st.tabs(["🍽️ Food Counts", "📊 Entities", "🎨 Row Visualization"])
+    
+    with tab1:
+        food_counts = results["food_counts"].most_common()
+        if food_counts:
+            page = paginate(food_counts, "food_counts_page")
+            st.dataframe(pd.DataFrame(page, columns=["Food", "Mentions"]), width='stretch', hide_index=True)
+        else:
+            st.info("No Filipino foods detected in this file.")
+        if results["label_counts"]:
+            st.caption(", ".join(f"{label}: {count}" for label, count in results["label_counts"].most_common()))
+    
+    with tab2:
+        labels = sorted(results["label_counts"])
+        selected = st.multiselect("Labels", labels, default=labels)
+        filtered = entity_rows if len(selected) == len(labels) else [row for row in entity_rows if row["Label"] in selected]
+        if filtered:
+            page = paginate(filtered, "entities_page")
+            st.dataframe(pd.DataFrame(page), width='stretch', hide_index=True)
+        else:
+            st.info("No entities to show.")
+    
+    with tab3:
+        # displaCy is rendered for one row at a time, and only when asked for
+        row_index = st.number_input(f"Row (0-{len(rows) - 1})", min_value=0, max_value=max(len(rows) - 1, 0), value=0)
+        if rows and st.button("Render row"):
+            row = rows[row_index]
+            st.caption(f"ID: {row['id']}")
+            display_visualization(doc_cache.get_doc(row["text"]))
+
+def search_food_index():
+    """Boolean food search over an index built with food_index.py, without reprocessing any text."""
+    import pandas as pd
+    
+    index_path = st.text_input("Index directory", value="food_index",
+                               help="Build one with: python food_index.py add tagged.jsonl --index food_index")
+    if not os.path.exists(os.path.join(index_path, "index.json")):
+        st.info(f"No index found at '{index_path}'. Tag a corpus with batch_tagger.py, then add it with food_index.py.")
+        return
+    index = get_food_index(index_path, os.stat(os.path.join(index_path, "index.json")).st_mtime_ns)
+    
+    query = st.text_input("Query", placeholder="Sisig AND Lechon Kawali, Adobo OR (Sinigang AND Kanin)")
+    st.caption(f"{index.doc_count} documents, {len(index.foods())} foods indexed")
+    if not query.strip():
+        top_foods = sorted(index.foods().items(), key=lambda item: -item[1])
+        st.dataframe(pd.DataFrame(paginate(top_foods, "index_foods_page"), columns=["Food", "Mentions"]),
+                     width='stretch', hide_index=True)
+        return
+    
+    try:
+        docs = index.query(query)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    st.success(f"{len(docs)} matching documents")
+    if not len(docs):
+        return
+    
+    # Offsets are only looked up for the documents on the visible page
+    terms = index.query_terms(query)
+    rows = []
+    for doc in paginate(docs, "index_results_page"):
+        doc_id, mentions = index.document(int(doc), terms)
+        rows.append({
+            "ID": doc_id,
+            "Foods": ", ".join(f"{food} ({len(spans)}x)" for food, spans in mentions.items()),
+            "Offsets": "; ".join(f"{food}: {spans}" for food, spans in mentions.items()),
+        })
+    st.dataframe(pd.DataFrame(rows), width='stretch', hide_index=True)
+
+def process_text(doc_cache, timer, text):
+    """Get the Doc for text through the cache, remembering the pipeline timings for the Performance panel."""
+    timer.clear_last()
+    doc = doc_cache.get_doc(text)
+    text_key = doc_cache.key(text)
+    if timer.last() is not None:
+        st.session_state["last_timing"] = dict(timer.last(), text_key=text_key)
+    elif st.session_state.get("last_timing", {}).get("text_key") != text_key:
+        st.session_state["last_timing"] = {"cached": True, "text_key": text_key}
+    return doc
+
+def analyze_text(doc_cache, user_input, show_token_table=False):
     """Analyze the input text for Filipino food entities."""
     if not user_input.strip():
         st.warning("⚠️ Please enter some text to analyze.")
         return
     
+    # Same cached result the preview used, so the pipeline runs once per text
     with st.spinner("Analyzing text..."):
-        doc = nlp(user_input)
+        doc = doc_cache.get_doc(user_input)
     
     # Results in tabs
     tab1, tab2, tab3 = st.tabs(["📊 All Entities", "🔍 Detailed Analysis", "🎨 Visualization"])
@@ -122,7 +365,7 @@ def analyze_text(user_input):
         display_all_entities(doc)
     
     with tab2:
-        display_detailed_analysis(doc)
+        display_detailed_analysis(doc, show_token_table, doc_key=doc_cache.key(user_input))
     
     with tab3:
         display_visualization(doc)
@@ -215,8 +458,8 @@ def display_all_entities(doc):
         col1, col2 = st.columns(2)
         
         for i, label in enumerate(sorted_labels):
-            entities = entity_groups[label]
-            unique_entities = list(set(entities))
+            # One pass to count every mention instead of a list.count() per distinct entity
+            entity_counts = Counter(entity_groups[label])
             
             with col1 if i % 2 == 0 else col2:
                 # Special styling for Filipino food
@@ -228,8 +471,7 @@ def display_all_entities(doc):
                     st.markdown(f"*{entity_descriptions.get(label, 'Entity type')}*")
                 
                 # Display entities
-                for entity in unique_entities:
-                    count = entities.count(entity)
+                for entity, count in entity_counts.most_common():
                     if label == "FILIPINO_FOOD":
                         st.write(f"{APP_CONFIG['emoji']} **{entity}** {f'({count}x)' if count > 1 else ''}")
                     else:
@@ -262,43 +504,60 @@ def display_all_entities(doc):
         - Dates and numbers
         """)
 
-def display_detailed_analysis(doc):
+# (column, attribute) pairs of the token table, in display order
+TOKEN_TABLE_COLUMNS = [
+    ("Text", ORTH), ("Lemma", LEMMA), ("POS", POS), ("Tag", TAG),
+    ("Dependency", DEP), ("Shape", SHAPE), ("Is Alpha", IS_ALPHA), ("Is Stop", IS_STOP),
+]
+TOKEN_STRING_COLUMNS = {"Text", "Lemma", "POS", "Tag", "Dependency", "Shape"}
+
+def build_token_table(doc):
+    """
+    Build the token table column by column from a single doc.to_array() call.
+    String columns are decoded once per distinct value rather than once per token.
+    """
+    import numpy as np
+    import pandas as pd
+    
+    array = doc.to_array([attr for _, attr in TOKEN_TABLE_COLUMNS])
+    columns = {}
+    for i, (name, _) in enumerate(TOKEN_TABLE_COLUMNS):
+        values = array[:, i]
+        if name in TOKEN_STRING_COLUMNS:
+            ids, inverse = np.unique(values, return_inverse=True)
+            strings = np.array([doc.vocab.strings[int(value)] if value else "" for value in ids], dtype=object)
+            columns[name] = strings[inverse]
+        else:
+            columns[name] = values.astype(bool)
+    return pd.DataFrame(columns)
+
+def display_detailed_analysis(doc, show_token_table=False, doc_key=None):
     """Display detailed token analysis."""
     st.subheader("Detailed Token Analysis")
     
+    # Alpha and stop-word counts come from one array pass instead of two loops over the tokens
+    flags = doc.to_array([IS_ALPHA, IS_STOP])
+    
     # Token statistics
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.metric("Total Tokens", len(doc))
     with col2:
-        alpha_tokens = sum(1 for token in doc if token.is_alpha)
-        st.metric("Word Tokens", alpha_tokens)
+        st.metric("Word Tokens", int(flags[:, 0].sum()))
     with col3:
-        stop_words = sum(1 for token in doc if token.is_stop)
-        st.metric("Stop Words", stop_words)
+        st.metric("Stop Words", int(flags[:, 1].sum()))
     with col4:
         entities = len(doc.ents)
         st.metric("Entities", entities)
     
-    # Detailed token table
+    if not show_token_table:
+        st.caption("Enable \"Show token table\" in the sidebar to see POS tags, lemmas and dependencies per token.")
+        return
+    
+    # Detailed token table; only the visible page is sent to the browser
     with st.expander("Click to see detailed token analysis"):
-        import pandas as pd
-        
-        token_data = []
-        for token in doc:
-            token_data.append({
-                "Text": token.text,
-                "Lemma": token.lemma_,
-                "POS": token.pos_,
-                "Tag": token.tag_,
-                "Dependency": token.dep_,
-                "Shape": token.shape_,
-                "Is Alpha": token.is_alpha,
-                "Is Stop": token.is_stop
-            })
-        
-        df = pd.DataFrame(token_data)
-        st.dataframe(df, width='stretch')
+        df = get_token_table(doc_key, doc) if doc_key else build_token_table(doc)
+        st.dataframe(paginate(df, "token_table_page"), width='stretch')
 
 def display_visualization(doc):
     """Display the spaCy visualization."""
@@ -321,6 +580,37 @@ def display_visualization(doc):
             else:
                 st.write(f"• **{ent.text}** -> {ent.label_}")
 
+def display_performance_panel(timer, last, title="Last request",
+                              empty_hint="Analyze some text to see per-component timings."):
+    """
+    Sidebar breakdown of where a run spent its time, per pipeline component: the last
+    single-text request, or in upload mode the whole run over the uploaded file.
+    """
+    st.sidebar.subheader("Performance")
+    
+    if last is None:
+        st.sidebar.caption(empty_hint)
+    elif last.get("cached"):
+        st.sidebar.caption("Last request was served from the Doc cache (no pipeline run).")
+    else:
+        tokens = last.get("tokens", sum(last.get("tokens_per_doc", [])))
+        help_text = f"{tokens} tokens"
+        if "wall_ms" in last:
+            help_text += f" in {last['docs']} rows; {last['wall_ms']:.0f} ms wall time including file reading"
+        st.sidebar.metric(title, f"{last['total_ms']:.1f} ms", help=help_text)
+        for name, ms in sorted(last["components_ms"].items(), key=lambda item: -item[1]):
+            share = ms / last["total_ms"] if last["total_ms"] else 0.0
+            st.sidebar.progress(min(share, 1.0), text=f"{name}: {ms:.2f} ms ({share:.0%})")
+    
+    with st.sidebar.expander("Totals since startup"):
+        components = timer.snapshot()["components"]
+        if components:
+            for name, stats in components.items():
+                st.write(f"**{name}**: {stats['calls']} calls, {stats['mean_ms_per_call']:.2f} ms/call, "
+                         f"{stats['us_per_token']:.1f} µs/token")
+        else:
+            st.write("No requests yet.")
+
 def setup_sidebar():
     """Setup the sidebar with information and controls."""
     st.sidebar.title("About CusiNER")
@@ -341,10 +631,19 @@ def setup_sidebar():
      
     """)
     
+    # Pipeline options
+    st.sidebar.subheader("Options")
+    show_token_table = st.sidebar.checkbox(
+        "Show token table",
+        value=False,
+        help="Runs the full pipeline (tagger, parser, lemmatizer). Leave off for faster entity-only analysis."
+    )
+    
     # Model information
     st.sidebar.subheader("Model Info")
     st.sidebar.info(f"""
     **Base Model**: en_core_web_sm  
+    **Profile**: {FULL_PROFILE if show_token_table else LIGHT_PROFILE}  
     **Custom Entities**: {len(FILIPINO_FOODS)} foods  
     **Variations**: {len(FILIPINO_FOOD_VARIATIONS)} alternative names
     """)
@@ -366,6 +665,7 @@ def setup_sidebar():
             if len(foods) > 5:
                 st.write(f"... and {len(foods) - 5} more")
     
+    return show_token_table
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,142 @@
+# batch_tagger.py
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from filipino_food_config import FilipinoFoodNER, PIPELINE_PROFILES
+from result_cache import ResultCache
+
+SUPPORTED_FORMATS = ("jsonl", "csv", "txt")
+
+
+def detect_format(path):
+    """Guess the corpus format from the file extension."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension in ("csv", "tsv"):
+        return "csv"
+    return "txt"
+
+
+def read_records(path, fmt=None, text_field="text", id_field="id"):
+    """
+    Stream (text, record_id) pairs from a JSONL, CSV or plain-text corpus.
+    Plain-text files are read one document per line. Records without an id
+    fall back to their line/row number so output can be joined back to input.
+    """
+    fmt = fmt or detect_format(path)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        yield from iter_file_records(f, fmt, text_field, id_field, tsv=path.lower().endswith(".tsv"))
+
+
+def iter_file_records(f, fmt, text_field="text", id_field="id", tsv=False):
+    """Like read_records, for an already open text file (e.g. an uploaded file wrapped in io.TextIOWrapper)."""
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Choose from: {', '.join(SUPPORTED_FORMATS)}")
+
+    if fmt == "jsonl":
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"line {line_number}: expected a JSON object, got {type(record).__name__}")
+            record_id = record.get(id_field)
+            # "id": null counts as missing; falsy ids such as 0 are kept
+            yield record.get(text_field) or "", line_number if record_id is None else record_id
+    elif fmt == "csv":
+        reader = csv.DictReader(f, delimiter="\t" if tsv else ",")
+        for row_number, row in enumerate(reader, start=1):
+            yield row.get(text_field) or "", row.get(id_field) or row_number
+    else:
+        for line_number, line in enumerate(f, start=1):
+            yield line.rstrip("\r\n"), line_number
+
+
+def doc_to_entities(doc):
+    """Convert a processed Doc into JSON-serializable entities with character offsets."""
+    return [
+        {
+            "text": ent.text,
+            "label": ent.label_,
+            "start": ent.start_char,
+            "end": ent.end_char,
+        }
+        for ent in doc.ents
+    ]
+
+
+def tag_corpus(nlp, records, batch_size=256, n_process=1, cache=None):
+    """
+    Run (text, record_id) pairs through nlp.pipe and yield one result per record.
+    nlp.pipe keeps input order, including when n_process > 1.
+    With a ResultCache, records are looked up a chunk at a time and only the
+    misses go through nlp; their results are written back to the cache.
+    """
+    if cache is None:
+        docs = nlp.pipe(records, as_tuples=True, batch_size=batch_size, n_process=n_process)
+        for doc, record_id in docs:
+            yield {"id": record_id, "entities": doc_to_entities(doc)}
+        return
+
+    records = iter(records)
+    chunk_size = batch_size * max(n_process, 1)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        texts = [text for text, _ in chunk]
+        results = cache.get_many(texts)
+        missing = [index for index in range(len(chunk)) if index not in results]
+        if missing:
+            docs = nlp.pipe((texts[index] for index in missing), batch_size=batch_size, n_process=n_process)
+            computed = {index: doc_to_entities(doc) for index, doc in zip(missing, docs)}
+            cache.put_many((texts[index], entities) for index, entities in computed.items())
+            results.update(computed)
+        for index, (_, record_id) in enumerate(chunk):
+            yield {"id": record_id, "entities": results[index]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tag a JSONL/CSV/TXT corpus with CuisiNER and stream JSONL results.")
+    parser.add_argument("input", help="Path to the input corpus")
+    parser.add_argument("-o", "--output", help="Output JSONL path (default: stdout)")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, help="Input format (default: from file extension)")
+    parser.add_argument("--text-field", default="text", help="Field/column holding the text (JSONL/CSV)")
+    parser.add_argument("--id-field", default="id", help="Field/column holding the record id (JSONL/CSV)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Documents per nlp.pipe batch")
+    parser.add_argument("--n-process", type=int, default=1, help="Number of worker processes for nlp.pipe")
+    parser.add_argument("--base-model", default="en_core_web_sm", help="Base spaCy model")
+    parser.add_argument("--profile", choices=list(PIPELINE_PROFILES), default="full",
+                        help="Pipeline profile; 'foods-only' is fastest when only FILIPINO_FOOD spans are needed")
+    parser.add_argument("--cache", help="SQLite result cache; unchanged texts are not reprocessed on later runs")
+    parser.add_argument("--cache-max-mb", type=float, help="Evict least recently used cached results beyond this size")
+    args = parser.parse_args(argv)
+
+    ner_model = FilipinoFoodNER(base_model=args.base_model, profile=args.profile)
+    nlp = ner_model.load_model_with_ruler()
+    cache = ResultCache(args.cache, ner_model.pipeline_fingerprint(), args.cache_max_mb) if args.cache else None
+    records = read_records(args.input, args.format, args.text_field, args.id_field)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    count = 0
+    try:
+        for result in tag_corpus(nlp, records, batch_size=args.batch_size, n_process=args.n_process, cache=cache):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Tagged {count} documents", file=sys.stderr)
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Result cache: {stats['hits']} hits, {stats['misses']} misses", file=sys.stderr)
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
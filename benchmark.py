@@ -0,0 +1,175 @@
+# benchmark.py
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+import spacy
+from filipino_food_config import FilipinoFoodNER, build_food_patterns, iter_canonical_foods
+
+SYNTHETIC_SUFFIXES = ["Special", "Deluxe", "ni Lola", "sa Gata", "Espesyal", "Bisaya", "Tagalog", "Ilocano"]
+
+
+def synthetic_catalog(size, seed=0):
+    """
+    The real catalog padded with made-up dish names to `size` entries, for
+    measuring how matching cost grows with the number of foods.
+    """
+    real_foods = list(iter_canonical_foods())
+    foods = list(real_foods)
+    rng = random.Random(seed)
+    counter = itertools.count(1)
+    while len(foods) < size:
+        surface, canonical = rng.choice(real_foods)
+        foods.append((f"{surface} {rng.choice(SYNTHETIC_SUFFIXES)} {next(counter)}", canonical))
+    return foods[:size] if size else foods
+
+
+def build_corpus(sentences_per_doc, n_docs, seed=0):
+    """Documents made of `sentences_per_doc` sentences drawn from the sample and evaluation texts."""
+    ner_model = FilipinoFoodNER(cache_dir=None)
+    food_sentences, non_food_sentences = ner_model.get_evaluation_sentences()
+    pool = ner_model.get_sample_texts() + food_sentences + non_food_sentences
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(pool) for _ in range(sentences_per_doc)) for _ in range(n_docs)]
+
+
+def load_pipeline(name, base_model="en_core_web_sm", catalog_size=0):
+    """Load one of the benchmarked pipelines: 'ruler', 'base' or 'trained'."""
+    if name == "ruler":
+        if not catalog_size:
+            return FilipinoFoodNER(base_model=base_model).load_model_with_ruler()
+        nlp = spacy.load(base_model)
+        ruler = nlp.add_pipe("entity_ruler", before="ner") if "ner" in nlp.pipe_names else nlp.add_pipe("entity_ruler")
+        ruler.add_patterns(build_food_patterns(nlp, synthetic_catalog(catalog_size)))
+        return nlp
+    if name == "base":
+        return spacy.load(base_model)
+    if name == "trained":
+        from ner_model import MODEL_DIR
+        if not os.path.exists(MODEL_DIR):
+            return None
+        return spacy.load(MODEL_DIR)
+    raise ValueError(f"Unknown pipeline '{name}'")
+
+
+def percentile_ms(latencies, q):
+    return float(np.percentile(latencies, q) * 1000) if latencies else None
+
+
+def run_case(nlp, texts, batch_size, n_process):
+    """
+    Process texts and return throughput and latency figures.
+    With n_process == 1 the texts are fed one batch at a time, and each doc's
+    latency is the wall time of the batch it belongs to. With more processes
+    only throughput is measured, since batches are spread across workers.
+    """
+    latencies = []
+    tokens = 0
+    start = time.perf_counter()
+    if n_process == 1:
+        for i in range(0, len(texts), batch_size):
+            chunk = texts[i:i + batch_size]
+            batch_start = time.perf_counter()
+            docs = list(nlp.pipe(chunk, batch_size=batch_size))
+            elapsed = time.perf_counter() - batch_start
+            latencies.extend([elapsed] * len(docs))
+            tokens += sum(len(doc) for doc in docs)
+    else:
+        for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+            tokens += len(doc)
+    seconds = time.perf_counter() - start
+
+    return {
+        "docs": len(texts),
+        "tokens": tokens,
+        "seconds": seconds,
+        "docs_per_sec": len(texts) / seconds,
+        "tokens_per_sec": tokens / seconds,
+        "latency_ms": {
+            "p50": percentile_ms(latencies, 50),
+            "p95": percentile_ms(latencies, 95),
+            "p99": percentile_ms(latencies, 99),
+        },
+    }
+
+
+def run_benchmarks(pipelines, doc_lengths, batch_sizes, n_processes, catalog_sizes,
+                   n_docs=500, base_model="en_core_web_sm", warmup=20):
+    """Sweep every combination of the given settings and return a list of result records."""
+    results = []
+    corpora = {length: build_corpus(length, n_docs) for length in doc_lengths}
+    for name in pipelines:
+        # Catalog size only changes the EntityRuler pipeline
+        sizes = catalog_sizes if name == "ruler" else [0]
+        for catalog_size in sizes:
+            nlp = load_pipeline(name, base_model, catalog_size)
+            if nlp is None:
+                print(f"Skipping '{name}': no trained model found (run ner_model.train_and_save_model first)")
+                break
+            for doc_length, batch_size, n_process in itertools.product(doc_lengths, batch_sizes, n_processes):
+                texts = corpora[doc_length]
+                for _ in nlp.pipe(texts[:warmup]):
+                    pass
+                record = {
+                    "pipeline": name,
+                    "components": nlp.pipe_names,
+                    "catalog_size": catalog_size or len(list(iter_canonical_foods())),
+                    "sentences_per_doc": doc_length,
+                    "batch_size": batch_size,
+                    "n_process": n_process,
+                }
+                record.update(run_case(nlp, texts, batch_size, n_process))
+                results.append(record)
+                p99 = record["latency_ms"]["p99"]
+                print(
+                    f"{name:<8} foods={record['catalog_size']:<7} len={doc_length:<4} batch={batch_size:<5} "
+                    f"procs={n_process:<3} {record['docs_per_sec']:>9.1f} docs/s {record['tokens_per_sec']:>10.0f} tok/s "
+                    f"p99={'-' if p99 is None else f'{p99:.1f}ms'}"
+                )
+    return results
+
+
+def environment_info():
+    return {
+        "python": sys.version.split()[0],
+        "spacy": spacy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput and latency benchmarks for the CuisiNER pipelines.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--pipelines", default="ruler,base,trained", help="Comma-separated: ruler, base, trained")
+    parser.add_argument("--doc-lengths", type=int_list, default=[1, 10, 50], help="Sentences per document")
+    parser.add_argument("--batch-sizes", type=int_list, default=[1, 32, 256])
+    parser.add_argument("--n-process", type=int_list, default=[1, 2])
+    parser.add_argument("--catalog-sizes", type=int_list, default=[0, 1000, 10000],
+                        help="Foods in the EntityRuler (0 = the real catalog); extra names are synthetic")
+    parser.add_argument("--n-docs", type=int, default=500, help="Documents per case")
+    parser.add_argument("--base-model", default="en_core_web_sm")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        [name for name in args.pipelines.split(",") if name],
+        args.doc_lengths, args.batch_sizes, args.n_process, args.catalog_sizes,
+        n_docs=args.n_docs, base_model=args.base_model,
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment_info(), "results": results}, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# corpus_builder.py
+import argparse
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import spacy
+from spacy.tokens import DocBin
+from ner_model import iter_shard_paths, make_annotated_doc
+
+# Per-process blank pipeline, created once by worker_nlp()
+_worker_nlp = None
+
+
+def iter_jsonl_records(path):
+    """Stream {"text": ..., "entities": [[start, end, label], ...]} records one line at a time."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON ({e})")
+
+
+def iter_chunks(iterable, size):
+    """Yield lists of up to `size` items without materializing the whole iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def worker_nlp():
+    """Blank English pipeline for the current process, created on first use."""
+    global _worker_nlp
+    if _worker_nlp is None:
+        _worker_nlp = spacy.blank("en")
+    return _worker_nlp
+
+
+def map_shards(function, tasks, n_process=1):
+    """
+    Yield function(*task) for each task, in task order. With n_process > 1
+    the calls run in a process pool with at most 2 * n_process tasks in
+    flight, so tasks can be a lazy iterator over a large input.
+    """
+    if n_process <= 1:
+        for task in tasks:
+            yield function(*task)
+        return
+    with ProcessPoolExecutor(max_workers=n_process, initializer=worker_nlp) as executor:
+        # Results are collected in submission order so output doesn't depend on scheduling
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(function, *task))
+            if len(pending) >= 2 * n_process:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def convert_shard(shard_path, records):
+    """Write one DocBin shard and return (shard_path, n_docs, misaligned entities)."""
+    nlp = worker_nlp()
+    doc_bin = DocBin()
+    misaligned = []
+    for record in records:
+        doc, skipped = make_annotated_doc(nlp, record["text"], record.get("entities", []))
+        misaligned.extend(skipped)
+        doc_bin.add(doc)
+    doc_bin.to_disk(shard_path)
+    return shard_path, len(records), misaligned
+
+
+def build_shards(input_path, output_dir, shard_size=10000, n_process=1, report_path=None):
+    """
+    Convert a JSONL training file into sharded .spacy DocBin files.
+    The input is read incrementally and at most 2 * n_process shards are in
+    flight, so memory stays flat regardless of file size. Misaligned entities
+    are written to report_path (one JSON object per line) instead of stdout.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if iter_shard_paths(output_dir):
+        raise ValueError(f"'{output_dir}' already contains .spacy shards; use an empty directory")
+    report_path = report_path or os.path.join(output_dir, "misaligned.jsonl")
+
+    summary = {"shards": 0, "docs": 0, "misaligned": 0}
+    tasks = (
+        (os.path.join(output_dir, f"shard-{index:05d}.spacy"), records)
+        for index, records in enumerate(iter_chunks(iter_jsonl_records(input_path), shard_size))
+    )
+
+    with open(report_path, "w", encoding="utf-8") as report:
+        for shard_path, n_docs, misaligned in map_shards(convert_shard, tasks, n_process):
+            summary["shards"] += 1
+            summary["docs"] += n_docs
+            summary["misaligned"] += len(misaligned)
+            for entity in misaligned:
+                report.write(json.dumps(entity, ensure_ascii=False) + "\n")
+            print(f"Wrote {shard_path} ({n_docs} docs)")
+
+    print(f"Converted {summary['docs']} docs into {summary['shards']} shards; "
+          f"{summary['misaligned']} misaligned entities logged to {report_path}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a JSONL training file into sharded DocBin files.")
+    parser.add_argument("input", help="JSONL with one {text, entities} object per line")
+    parser.add_argument("output_dir", help="Directory for the .spacy shards")
+    parser.add_argument("--shard-size", type=int, default=10000, help="Documents per shard")
+    parser.add_argument("--n-process", type=int, default=1, help="Worker processes for conversion")
+    parser.add_argument("--report", help="Misaligned-entity report (default: <output_dir>/misaligned.jsonl)")
+    args = parser.parse_args(argv)
+    build_shards(args.input, args.output_dir, args.shard_size, args.n_process, args.report)
+
+
+if __name__ == "__main__":
+    main()
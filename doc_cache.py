@@ -0,0 +1,69 @@
+# doc_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from spacy.tokens import Doc
+
+
+class DocCache:
+    """
+    Bounded LRU cache of processed Docs.
+
+    Docs are stored as serialized bytes keyed by a hash of the text plus the
+    pipeline version, so entries from a different model or food catalog are
+    never reused and cached texts don't keep whole Doc objects alive.
+    """
+
+    def __init__(self, nlp, model_version, max_entries=256):
+        self.nlp = nlp
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, text):
+        """Cache key for text under the current pipeline version."""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_version}:{text_hash}"
+
+    def get_doc(self, text):
+        """Return the processed Doc for text, running the pipeline only on a cache miss."""
+        key = self.key(text)
+        with self._lock:
+            doc_bytes = self._entries.get(key)
+            if doc_bytes is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if doc_bytes is not None:
+            return Doc(self.nlp.vocab).from_bytes(doc_bytes)
+
+        doc = self.nlp(text)
+        doc_bytes = doc.to_bytes()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = doc_bytes
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return doc
+
+    def clear(self):
+        """Drop every cached Doc."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes": sum(len(doc_bytes) for doc_bytes in self._entries.values()),
+            }
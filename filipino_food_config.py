@@ -2,7 +2,14 @@
 import spacy
 from spacy.pipeline import EntityRuler
 from spacy.training import Example
+import hashlib
+import json
+import os
 import random
+import re
+import shutil
+import tempfile
+import time
 
 # Comprehensive Filipino food items database
 FILIPINO_FOODS = [
@@ -49,41 +56,252 @@ FILIPINO_FOOD_VARIATIONS = {
     "Fish Ball": "Fish Balls",
 }
 
+# Bump when build_food_patterns changes so cached pipelines get rebuilt
+FOOD_PATTERN_VERSION = 1
+
+# Where assembled pipelines are cached between runs (set CUISINER_CACHE_DIR to override)
+DEFAULT_CACHE_DIR = os.environ.get("CUISINER_CACHE_DIR", ".cuisiner_cache")
+
+# Base-model components each pipeline profile leaves out. The EntityRuler is always added.
+PIPELINE_PROFILES = {
+    # FILIPINO_FOOD spans only: tokenizer + EntityRuler
+    "foods-only": ["tok2vec", "tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"],
+    # FILIPINO_FOOD plus the statistical entities (PERSON, ORG, GPE, ...); en_core_web_sm's ner has its own tok2vec
+    "foods+ner": ["tok2vec", "tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer"],
+    # Everything, including POS tags, dependencies and lemmas
+    "full": [],
+}
+
+def normalize_food_key(text):
+    """Normalize a food name so casing, hyphens and spacing don't matter ("Halo-halo" == "halo halo")."""
+    return re.sub(r"[\s\-]+", " ", text.lower()).strip()
+
+def iter_canonical_foods():
+    """Yield (surface, canonical) pairs for every food and variation, foods first."""
+    for food in FILIPINO_FOODS:
+        yield food, food
+    for variation, main_food in FILIPINO_FOOD_VARIATIONS.items():
+        yield variation, main_food
+
+def build_food_patterns(nlp, foods=None):
+    """
+    Build one EntityRuler token pattern per distinct normalized food name.
+    foods: iterable of (surface, canonical) pairs; defaults to iter_canonical_foods().
+    Tokens match on LOWER and every gap accepts an optional hyphen, so a single
+    pattern covers "Halo-halo", "HALO HALO" and "halo-Halo". The pattern id is
+    the canonical food name from FILIPINO_FOOD_VARIATIONS (available as ent.ent_id_).
+    """
+    patterns = []
+    seen = set()
+    for surface, canonical in foods if foods is not None else iter_canonical_foods():
+        key = normalize_food_key(surface)
+        if key in seen:
+            continue
+        seen.add(key)
+        
+        token_pattern = []
+        for token in nlp.make_doc(key):
+            if token_pattern:
+                token_pattern.append({"ORTH": "-", "OP": "?"})
+            token_pattern.append({"LOWER": token.lower_})
+        patterns.append({"label": "FILIPINO_FOOD", "pattern": token_pattern, "id": canonical})
+    return patterns
+
+def model_dir_fingerprint(path):
+    """
+    Hash of a pipeline directory: the contents of its meta.json and config.cfg plus
+    every file's relative path, size and mtime, so retraining into the same
+    directory changes it without reading the weights.
+    """
+    digest = hashlib.sha256()
+    for name in ("meta.json", "config.cfg"):
+        file_path = os.path.join(path, name)
+        if os.path.exists(file_path):
+            with open(file_path, "rb") as f:
+                digest.update(f.read())
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            stat = os.stat(file_path)
+            digest.update(f"{os.path.relpath(file_path, path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def catalog_fingerprint(base_model):
+    """
+    Content hash of everything that shapes the assembled pipeline: the food
+    lists, variations, pattern format, base model and spaCy version. A base
+    model given as a directory has no package version, so its files are hashed instead.
+    """
+    payload = {
+        "foods": FILIPINO_FOODS,
+        "variations": FILIPINO_FOOD_VARIATIONS,
+        "pattern_version": FOOD_PATTERN_VERSION,
+        "base_model": base_model,
+        "base_model_version": spacy.util.get_package_version(base_model),
+        "base_model_files": model_dir_fingerprint(base_model) if os.path.isdir(base_model) else None,
+        "spacy_version": spacy.__version__,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+# Preferred chunk boundaries for long documents, strongest first
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+SENTENCE_BREAK = re.compile(r"[.!?][\"')\]]*\s+")
+WHITESPACE = re.compile(r"\s")
+
+def _find_chunk_cut(text, start, max_chars):
+    """Where to end a chunk starting at start: the last paragraph break, else sentence break, else space in its second half."""
+    limit = min(len(text), start + max_chars)
+    if limit == len(text):
+        return limit
+    low = start + max_chars // 2
+    for pattern in (PARAGRAPH_BREAK, SENTENCE_BREAK):
+        cut = None
+        for match in pattern.finditer(text, low, limit):
+            cut = match.end()
+        if cut:
+            return cut
+    space = text.rfind(" ", low, limit)
+    return space + 1 if space != -1 else limit
+
+def iter_text_chunks(text, max_chars=20000, overlap=200):
+    """
+    Split text into (chunk_start, own_start, own_end, chunk_text) tuples.
+    Each chunk owns [own_start, own_end) and extends up to overlap characters
+    past both ends (snapped to whitespace), so an entity that straddles a cut
+    is seen whole by the chunk that owns its first character.
+    """
+    if overlap * 2 >= max_chars:
+        raise ValueError("overlap must be less than half of max_chars")
+    own_start = 0
+    while own_start < len(text):
+        own_end = _find_chunk_cut(text, own_start, max_chars - 2 * overlap)
+        chunk_start = max(0, own_start - overlap)
+        if chunk_start:
+            match = WHITESPACE.search(text, chunk_start, own_start)
+            chunk_start = match.end() if match else own_start
+        chunk_end = min(len(text), own_end + overlap)
+        if chunk_end < len(text):
+            space = max(text.rfind(" ", own_end, chunk_end), text.rfind("\n", own_end, chunk_end))
+            chunk_end = space if space != -1 else own_end
+        yield chunk_start, own_start, own_end, text[chunk_start:chunk_end]
+        own_start = own_end
+
 class FilipinoFoodNER:
-    def __init__(self, base_model="en_core_web_sm"):
-        """Initialize the Filipino Food NER model."""
+    def __init__(self, base_model="en_core_web_sm", cache_dir=DEFAULT_CACHE_DIR, profile="full", gazetteer=None):
+        """
+        Initialize the Filipino Food NER model.
+        Set cache_dir=None to always rebuild the pipeline from the Python lists.
+        profile picks which base-model components are loaded (see PIPELINE_PROFILES).
+        gazetteer is a directory written by gazetteer_store.py; when set, foods are
+        matched from it instead of an EntityRuler built from FILIPINO_FOODS.
+        """
+        if profile not in PIPELINE_PROFILES:
+            raise ValueError(f"Unknown profile '{profile}'. Choose from: {', '.join(PIPELINE_PROFILES)}")
         self.base_model = base_model
+        self.cache_dir = cache_dir
+        self.profile = profile
+        self.gazetteer = gazetteer
         self.nlp = None
+    
+    def pipeline_fingerprint(self):
+        """Identify everything that shapes this pipeline's output: catalog, base model, spaCy version and profile."""
+        payload = f"{catalog_fingerprint(self.base_model)}:{self.profile}"
+        if self.gazetteer:
+            with open(os.path.join(self.gazetteer, "meta.json"), "r", encoding="utf-8") as f:
+                payload += f":{json.load(f)['checksum']}"
+        payload = payload.encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+    
+    def cached_pipeline_path(self):
+        """Location of the cached pipeline for the current catalog, or None if caching is off."""
+        if not self.cache_dir or self.gazetteer:
+            # A gazetteer pipeline has no patterns to compile, so there is nothing worth caching
+            return None
+        model_name = os.path.basename(os.path.normpath(self.base_model)).replace(":", "_")
+        fingerprint = catalog_fingerprint(self.base_model)[:16]
+        return os.path.join(self.cache_dir, f"{model_name}-{self.profile}-{fingerprint}")
         
     def load_model_with_ruler(self):
-        """Load spaCy model with EntityRuler for Filipino food recognition."""
-        nlp = spacy.load(self.base_model)
+        """
+        Load spaCy model with EntityRuler for Filipino food recognition.
+        When caching is on, a pipeline saved for the same catalog fingerprint is
+        loaded directly; otherwise it is built and saved for the next start.
+        """
+        cache_path = self.cached_pipeline_path()
+        if cache_path and os.path.isdir(cache_path):
+            self.nlp = spacy.load(cache_path)
+            return self.nlp
+        
+        nlp = self._build_model_with_ruler()
+        if cache_path:
+            self._save_to_cache(nlp, cache_path)
+        self.nlp = nlp
+        return nlp
+    
+    def _save_to_cache(self, nlp, cache_path):
+        """Write the pipeline to a temp dir and move it into place so readers never see a partial save."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            nlp.to_disk(tmp_path)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # Another process saved the same fingerprint first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    
+    def _build_model_with_ruler(self):
+        """Assemble the base model plus the Filipino food EntityRuler from scratch."""
+        nlp = spacy.load(self.base_model, exclude=PIPELINE_PROFILES[self.profile])
+        if self.gazetteer:
+            # Registers the food_gazetteer factory
+            import gazetteer_store  # noqa: F401
+            nlp.add_pipe("food_gazetteer", config={"path": self.gazetteer},
+                         **({"before": "ner"} if "ner" in nlp.pipe_names else {}))
+            return nlp
         
         # Create entity ruler
         if "entity_ruler" not in nlp.pipe_names:
-            ruler = nlp.add_pipe("entity_ruler", before="ner")
+            if "ner" in nlp.pipe_names:
+                ruler = nlp.add_pipe("entity_ruler", before="ner")
+            else:
+                ruler = nlp.add_pipe("entity_ruler")
         else:
             ruler = nlp.get_pipe("entity_ruler")
         
-        # Create patterns for Filipino food
-        patterns = []
-        
-        # Add main food items
-        for food in FILIPINO_FOODS:
-            patterns.append({"label": "FILIPINO_FOOD", "pattern": food})
-            patterns.append({"label": "FILIPINO_FOOD", "pattern": food.lower()})
-            patterns.append({"label": "FILIPINO_FOOD", "pattern": food.upper()})
-        
-        # Add variations
-        for variation, main_food in FILIPINO_FOOD_VARIATIONS.items():
-            patterns.append({"label": "FILIPINO_FOOD", "pattern": variation})
-            patterns.append({"label": "FILIPINO_FOOD", "pattern": variation.lower()})
-            patterns.append({"label": "FILIPINO_FOOD", "pattern": variation.upper()})
+        # One case-insensitive pattern per distinct food
+        patterns = build_food_patterns(nlp)
         
         ruler.add_patterns(patterns)
-        self.nlp = nlp
         return nlp
     
+    def process_long_text(self, text, max_chunk_chars=20000, overlap_chars=200, batch_size=8, n_process=1):
+        """
+        Yield the entities of an arbitrarily long text, in order, with offsets into the original text.
+        The text is cut at paragraph or sentence boundaries into chunks that go
+        through nlp.pipe; only batch_size chunk Docs are alive at a time.
+        Entities are kept by the chunk that owns their start, which drops the
+        duplicates and truncated fragments from the overlapping margins.
+        """
+        nlp = self.nlp or self.load_model_with_ruler()
+        if max_chunk_chars > nlp.max_length:
+            raise ValueError(f"max_chunk_chars ({max_chunk_chars}) exceeds nlp.max_length ({nlp.max_length})")
+        chunks = (
+            (chunk_text, (chunk_start, own_start, own_end))
+            for chunk_start, own_start, own_end, chunk_text in iter_text_chunks(text, max_chunk_chars, overlap_chars)
+        )
+        for doc, (chunk_start, own_start, own_end) in nlp.pipe(chunks, as_tuples=True, batch_size=batch_size, n_process=n_process):
+            for ent in doc.ents:
+                start = chunk_start + ent.start_char
+                if own_start <= start < own_end:
+                    yield {
+                        "text": ent.text,
+                        "label": ent.label_,
+                        "start": start,
+                        "end": chunk_start + ent.end_char,
+                    }
+    
     def create_training_data(self):
         """Create training data for custom NER model training."""
         training_data = [
@@ -110,13 +328,45 @@ class FilipinoFoodNER:
         ]
         return training_data
     
-    def train_custom_model(self, training_data, iterations=30, output_dir="./filipino_food_model"):
-        """Train a custom NER model (advanced option)."""
-        if self.nlp is None:
+    def train_custom_model(self, training_data, iterations=30, output_dir="./filipino_food_model",
+                           dev_data=None, dev_split=0.2, eval_every=20, patience=5,
+                           batch_size=8, dropout=0.3, resume=False, seed=0):
+        """
+        Train a custom NER model (advanced option).
+        
+        The dev set (dev_data, or a dev_split share held out from training_data)
+        is scored every eval_every updates. The best model so far is saved to
+        output_dir. Training stops after `patience` evaluations without
+        improvement. The last model, the loop position, the best dev score and
+        the patience counter are checkpointed to f"{output_dir}_checkpoint", so
+        resume=True continues an interrupted run. Resuming a run that already
+        stopped early or finished just loads its best model.
+        """
+        checkpoint_dir = f"{os.path.normpath(output_dir)}_checkpoint"
+        state_path = os.path.join(checkpoint_dir, "training_state.json")
+        state = {"epoch": 0, "batches_done": 0, "step": 0, "best_score": -1.0, "bad_evals": 0, "history": [],
+                 "finished": None}
+        
+        if resume and os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                state.update(json.load(f))
+            if state["finished"] is None and state["bad_evals"] >= patience:
+                # Checkpoints written before "finished" was recorded
+                state["finished"] = "early_stopped"
+            if state["finished"] is not None:
+                print(f"Training already {state['finished'].replace('_', ' ')} at step {state['step']} "
+                      f"(best F1 {state['best_score']:.3f}); loading {output_dir}")
+                self.nlp = spacy.load(output_dir if os.path.isdir(output_dir) else os.path.join(checkpoint_dir, "model-last"))
+                return self.nlp
+            self.nlp = spacy.load(os.path.join(checkpoint_dir, "model-last"))
+            print(f"Resuming from epoch {state['epoch'] + 1}, step {state['step']} "
+                  f"(best F1 {state['best_score']:.3f}, {state['bad_evals']}/{patience} evaluations without improvement)")
+        elif self.nlp is None:
             self.nlp = spacy.load(self.base_model)
         
         # Add NER component if not present
-        if "ner" not in self.nlp.pipe_names:
+        is_new_ner = "ner" not in self.nlp.pipe_names
+        if is_new_ner:
             ner = self.nlp.add_pipe("ner")
         else:
             ner = self.nlp.get_pipe("ner")
@@ -124,29 +374,119 @@ class FilipinoFoodNER:
         # Add new label
         ner.add_label("FILIPINO_FOOD")
         
+        # Hold out a dev set if none was given (same split on every run for the same seed)
+        if dev_data is None:
+            training_data = list(training_data)
+            random.Random(seed).shuffle(training_data)
+            n_dev = max(1, int(len(training_data) * dev_split))
+            dev_data, training_data = training_data[:n_dev], training_data[n_dev:]
+        
         # Convert training data to spaCy format
-        examples = []
-        for text, annotations in training_data:
-            doc = self.nlp.make_doc(text)
-            example = Example.from_dict(doc, annotations)
-            examples.append(example)
-        
-        # Training loop
-        self.nlp.initialize()
-        for i in range(iterations):
-            random.shuffle(examples)
-            losses = {}
-            batches = spacy.util.minibatch(examples, size=8)
-            for batch in batches:
-                self.nlp.update(batch, losses=losses, drop=0.3)
-            print(f"Iteration {i+1}, Loss: {losses}")
+        examples = [Example.from_dict(self.nlp.make_doc(text), annotations) for text, annotations in training_data]
+        dev_examples = [Example.from_dict(self.nlp.make_doc(text), annotations) for text, annotations in dev_data]
+        
+        # Only train (and score) ner, plus a shared tok2vec if ner listens to it
+        trainable = ["ner"]
+        if "tok2vec" in self.nlp.pipe_names and "ner" in self.nlp.get_pipe("tok2vec").listening_components:
+            trainable.append("tok2vec")
+        
+        frozen = [name for name in self.nlp.pipe_names if name not in trainable]
         
-        # Save model
-        self.nlp.to_disk(output_dir)
-        print(f"Model saved to {output_dir}")
+        # A fresh ner needs initializing; pretrained weights are kept, and a loaded checkpoint already has its ner
+        if is_new_ner:
+            ner.initialize(lambda: examples, nlp=self.nlp)
+        optimizer = self.nlp.resume_training()
+        
+        stop = False
+        for epoch in range(state["epoch"], iterations):
+            # Seeding per epoch makes the batch order reproducible when resuming mid-epoch
+            epoch_examples = list(examples)
+            random.Random(seed + epoch).shuffle(epoch_examples)
+            losses = {}
+            for batch_index, batch in enumerate(spacy.util.minibatch(epoch_examples, size=batch_size)):
+                if batch_index < state["batches_done"]:
+                    continue
+                self.nlp.update(batch, sgd=optimizer, losses=losses, drop=dropout, exclude=frozen)
+                state["step"] += 1
+                state["batches_done"] = batch_index + 1
+                
+                if state["step"] % eval_every == 0:
+                    stop = self._evaluate_and_checkpoint(dev_examples, trainable, state, output_dir, checkpoint_dir, patience, epoch)
+                    if stop:
+                        break
+            if losses:
+                print(f"Iteration {epoch+1}, Loss: {losses}")
+            if stop:
+                print(f"Early stopping: no dev improvement in {patience} evaluations")
+                break
+            state["epoch"] = epoch + 1
+            state["batches_done"] = 0
+        else:
+            # Score the final weights too, unless the last update was just scored
+            if state["step"] % eval_every:
+                self._evaluate_and_checkpoint(dev_examples, trainable, state, output_dir, checkpoint_dir, patience, iterations)
+        state["finished"] = "early_stopped" if stop else "completed"
+        self._write_training_state(checkpoint_dir, state)
         
+        print(f"Best dev F1 {state['best_score']:.3f}; model saved to {output_dir}")
+        if os.path.isdir(output_dir):
+            self.nlp = spacy.load(output_dir)
         return self.nlp
     
+    def _evaluate_and_checkpoint(self, dev_examples, trainable, state, output_dir, checkpoint_dir, patience, epoch):
+        """Score the dev set, save the best and last models, and return True when patience runs out."""
+        # Score the trained ner on its own so an EntityRuler in the pipeline doesn't mask it
+        with self.nlp.select_pipes(enable=trainable):
+            score = self.nlp.evaluate(dev_examples).get("ents_f") or 0.0
+        state["history"].append({"step": state["step"], "ents_f": score})
+        
+        if score > state["best_score"]:
+            state["best_score"] = score
+            state["bad_evals"] = 0
+            self.nlp.to_disk(output_dir)
+            print(f"Step {state['step']}: dev F1 {score:.3f} (new best, saved to {output_dir})")
+        else:
+            state["bad_evals"] += 1
+            print(f"Step {state['step']}: dev F1 {score:.3f} (best {state['best_score']:.3f})")
+        
+        state["epoch"] = epoch
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.nlp.to_disk(os.path.join(checkpoint_dir, "model-last"))
+        self._write_training_state(checkpoint_dir, state)
+        return state["bad_evals"] >= patience
+    
+    @staticmethod
+    def _write_training_state(checkpoint_dir, state):
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        with open(os.path.join(checkpoint_dir, "training_state.json"), "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+    
+    def get_evaluation_sentences(self):
+        """Return (filipino_food_sentences, non_food_sentences) used by the evaluators."""
+        filipino_food_sentences = [f"I love eating {food}." for food in FILIPINO_FOODS]
+        
+        non_food_sentences = [
+            "I went to the store today.", "John works at Microsoft.", "The meeting is in Manila.",
+            "She bought a new car.", "The weather is nice.", "Pizza and pasta for dinner.",
+            "I love sushi and ramen.", "Coffee and donuts this morning.", "Basketball game tonight.",
+            "Reading a good book.", "Maria lives in Cebu.", "The conference starts at 9 AM.",
+            "Google launched a new product.", "I visited New York last year.", "The movie was great.",
+            "He graduated from UP.", "Apple released the iPhone.", "Traffic is heavy today.",
+            "I need to buy groceries.", "The flight to Japan is delayed.", "She works as a doctor.",
+            "The restaurant is expensive.", "I downloaded a new app.", "Christmas is next month.",
+            "The exam is on Friday.", "Samsung makes good phones.", "I called my mother yesterday.",
+            "The concert was amazing.", "Tesla stock went up.", "I'm reading Harry Potter.",
+            "The gym is closed today.", "Facebook changed its name.", "I bought new shoes.",
+            "The wedding is in December.", "Netflix has good shows.", "I learned to cook pasta.",
+            "The beach was crowded.", "Amazon delivered my package.", "I took a taxi home.",
+            "The hotel room was clean.", "YouTube has funny videos.", "I planted some flowers.",
+            "The airplane was delayed.", "Instagram updated its features.", "I visited my grandmother.",
+            "The library is quiet.", "Microsoft Office is useful.", "I watched a documentary.",
+            "The park is beautiful.", "Twitter has breaking news.", "I bought concert tickets.",
+            "The school is nearby.", "LinkedIn job posting.", "I studied mathematics."
+        ]
+        return filipino_food_sentences, non_food_sentences
+    
     def get_sample_texts(self):
         """Return sample texts for testing."""
         return [
@@ -157,6 +497,28 @@ class FilipinoFoodNER:
             "The party menu included Lechon Kawali, Sisig, Crispy Pata, and various Filipino desserts like Leche Flan and Ube Halaya.",
         ]
 
+def measure_profile_throughput(texts, base_model="en_core_web_sm", profiles=None, batch_size=64):
+    """
+    Run the same texts through each pipeline profile and report docs/sec.
+    Returns {profile: {"docs_per_sec": ..., "components": [...]}}.
+    """
+    results = {}
+    for profile in profiles or PIPELINE_PROFILES:
+        nlp = FilipinoFoodNER(base_model=base_model, profile=profile).load_model_with_ruler()
+        # Warm-up so lazy initialisation isn't timed
+        for _ in nlp.pipe(texts[:batch_size], batch_size=batch_size):
+            pass
+        start = time.perf_counter()
+        for _ in nlp.pipe(texts, batch_size=batch_size):
+            pass
+        elapsed = time.perf_counter() - start
+        results[profile] = {
+            "docs_per_sec": len(texts) / elapsed if elapsed else float("inf"),
+            "components": nlp.pipe_names,
+        }
+        print(f"{profile:<12} {results[profile]['docs_per_sec']:>10.1f} docs/sec  ({', '.join(nlp.pipe_names)})")
+    return results
+
 # Display configuration
 DISPLAY_CONFIG = {
     "colors": {"FILIPINO_FOOD": "#ff6b6b"},  # Red color for Filipino food
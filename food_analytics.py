@@ -0,0 +1,277 @@
+# food_analytics.py
+import argparse
+import hashlib
+import itertools
+import json
+import sys
+from datetime import datetime, timezone
+import numpy as np
+from filipino_food_config import FILIPINO_FOODS, FilipinoFoodNER, iter_canonical_foods, normalize_food_key
+
+WINDOW_FORMATS = {"day": "%Y-%m-%d", "week": "%G-W%V", "month": "%Y-%m", "year": "%Y"}
+
+
+def window_key(timestamp, window):
+    """Bucket an ISO-8601 string or a Unix timestamp into a day/week/month/year label."""
+    if isinstance(timestamp, (int, float)):
+        moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    else:
+        moment = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+    return moment.strftime(WINDOW_FORMATS[window])
+
+
+class CountMinSketch:
+    """
+    Approximate counts in a fixed depth x width table.
+    Estimates never undercount and overcount by at most 2N/width with
+    probability 1 - (1/2)^depth, where N is the total count added.
+    """
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+
+    def _columns(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, item, count=1):
+        self.table[self._rows, self._columns(item)] += count
+
+    def estimate(self, item):
+        return int(self.table[self._rows, self._columns(item)].min())
+
+
+class SpaceSaving:
+    """
+    Heavy hitters in at most capacity counters (Metwally et al.'s Space-Saving).
+    Any item whose true count exceeds N/capacity is guaranteed to be kept.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}
+
+    def add(self, item, count=1):
+        if item in self.counts or len(self.counts) < self.capacity:
+            self.counts[item] = self.counts.get(item, 0) + count
+            return
+        # Replace the smallest counter; the newcomer inherits its count as an upper bound
+        smallest = min(self.counts, key=self.counts.get)
+        self.counts[item] = self.counts.pop(smallest) + count
+
+    def top(self, k):
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:k]
+
+
+class FoodAnalytics:
+    """
+    Streaming food frequencies, pairwise co-occurrence and per-window top dishes.
+
+    With a catalog of up to exact_limit foods, counts are exact: a frequency
+    vector and a co-occurrence matrix indexed by each food's position in the
+    catalog (FILIPINO_FOODS by default). Larger catalogs switch to a
+    count-min sketch for frequencies and pairs plus Space-Saving heavy
+    hitters for the top-k lists, so memory stays fixed however many foods
+    and pairs appear; sketch=True uses them whatever the catalog size.
+    Co-occurrence counts documents that mention both foods.
+    """
+
+    def __init__(self, foods=None, exact_limit=2000, window=None, top_capacity=1000,
+                 sketch_width=2048, sketch_depth=4, sketch=False):
+        self.foods = list(foods or FILIPINO_FOODS)
+        self.position = {food: index for index, food in enumerate(self.foods)}
+        self.exact = not sketch and len(self.foods) <= exact_limit
+        self.window = window
+        self.top_capacity = top_capacity
+        self.docs = 0
+        self.mentions = 0
+        # Foods outside the catalog (e.g. found by a trained model) can be unbounded, so only the top ones are kept
+        self.unknown = SpaceSaving(top_capacity)
+        self.windows = {}
+        if self.exact:
+            n = len(self.foods)
+            self.frequencies = np.zeros(n, dtype=np.int64)
+            self.doc_frequencies = np.zeros(n, dtype=np.int64)
+            self.cooccurrence = np.zeros((n, n), dtype=np.int64)
+        else:
+            self.frequency_sketch = CountMinSketch(sketch_width, sketch_depth)
+            self.pair_sketch = CountMinSketch(sketch_width, sketch_depth)
+            self.top_foods_tracker = SpaceSaving(top_capacity)
+            self.top_pairs_tracker = SpaceSaving(top_capacity)
+
+    def add(self, foods, timestamp=None):
+        """Add one document given the canonical food name of each of its mentions."""
+        self.docs += 1
+        known = [food for food in foods if food in self.position]
+        for food in foods:
+            if food not in self.position:
+                self.unknown.add(food)
+        self.mentions += len(known)
+
+        if self.exact:
+            positions = np.fromiter((self.position[food] for food in known), dtype=np.int64, count=len(known))
+            np.add.at(self.frequencies, positions, 1)
+            present = np.unique(positions)
+            self.doc_frequencies[present] += 1
+            self.cooccurrence[np.ix_(present, present)] += 1
+        else:
+            for food in known:
+                self.frequency_sketch.add(food)
+                self.top_foods_tracker.add(food)
+            for pair in itertools.combinations(sorted(set(known)), 2):
+                key = "\t".join(pair)
+                self.pair_sketch.add(key)
+                self.top_pairs_tracker.add(key)
+
+        if self.window and timestamp is not None and known:
+            key = window_key(timestamp, self.window)
+            if self.exact:
+                counts = self.windows.get(key)
+                if counts is None:
+                    counts = self.windows[key] = np.zeros(len(self.foods), dtype=np.int64)
+                np.add.at(counts, positions, 1)
+            else:
+                tracker = self.windows.setdefault(key, SpaceSaving(self.top_capacity))
+                for food in known:
+                    tracker.add(food)
+
+    def count(self, food):
+        """Mentions of food (an upper-bound estimate in sketch mode)."""
+        if food not in self.position:
+            return 0
+        if self.exact:
+            return int(self.frequencies[self.position[food]])
+        return self.frequency_sketch.estimate(food)
+
+    def pair_count(self, food_a, food_b):
+        """Documents mentioning both foods (an upper-bound estimate in sketch mode)."""
+        if food_a not in self.position or food_b not in self.position:
+            return 0
+        if self.exact:
+            return int(self.cooccurrence[self.position[food_a], self.position[food_b]])
+        return self.pair_sketch.estimate("\t".join(sorted((food_a, food_b))))
+
+    def top_foods(self, k=10):
+        if self.exact:
+            order = np.argsort(-self.frequencies, kind="stable")[:k]
+            return [(self.foods[i], int(self.frequencies[i])) for i in order if self.frequencies[i]]
+        return self._rank(self.top_foods_tracker, self.frequency_sketch, k)
+
+    def top_pairs(self, k=10):
+        if self.exact:
+            # Upper triangle only: each unordered pair once, no food with itself
+            upper = np.triu(self.cooccurrence, k=1)
+            flat = np.argsort(-upper, axis=None, kind="stable")[:k]
+            rows, cols = np.unravel_index(flat, upper.shape)
+            return [((self.foods[r], self.foods[c]), int(upper[r, c])) for r, c in zip(rows, cols) if upper[r, c]]
+        return [(tuple(key.split("\t")), count) for key, count in self._rank(self.top_pairs_tracker, self.pair_sketch, k)]
+
+    @staticmethod
+    def _rank(tracker, sketch, k):
+        """Heavy-hitter candidates ranked by their sketch estimate, which is tighter than the Space-Saving counter."""
+        estimates = [(item, sketch.estimate(item)) for item in tracker.counts]
+        return sorted(estimates, key=lambda item: -item[1])[:k]
+
+    def top_per_window(self, k=5):
+        """{window label: [(food, count), ...]} in chronological order."""
+        result = {}
+        for key in sorted(self.windows):
+            counts = self.windows[key]
+            if self.exact:
+                order = np.argsort(-counts, kind="stable")[:k]
+                result[key] = [(self.foods[i], int(counts[i])) for i in order if counts[i]]
+            else:
+                result[key] = counts.top(k)
+        return result
+
+    def summary(self, k=10):
+        return {
+            "mode": "exact" if self.exact else "sketch",
+            "docs": self.docs,
+            "mentions": self.mentions,
+            "top_foods": self.top_foods(k),
+            "top_pairs": [[list(pair), count] for pair, count in self.top_pairs(k)],
+            "top_per_window": self.top_per_window(k),
+            "unknown_foods": self.unknown.top(k),
+        }
+
+
+def iter_tagged_foods(path, time_field=None):
+    """(canonical foods, timestamp) per line of batch_tagger.py output."""
+    canonical = {normalize_food_key(surface): food for surface, food in iter_canonical_foods()}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            foods = [canonical.get(normalize_food_key(entity["text"]), entity["text"])
+                     for entity in record["entities"] if entity["label"] == "FILIPINO_FOOD"]
+            yield foods, record.get(time_field) if time_field else None
+
+
+def iter_corpus_foods(path, text_field="text", time_field=None, base_model="en_core_web_sm", batch_size=256):
+    """(canonical foods, timestamp) per line of a raw JSONL corpus, tagged with the foods-only pipeline."""
+    nlp = FilipinoFoodNER(base_model=base_model, profile="foods-only").load_model_with_ruler()
+
+    def records():
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.get(text_field) or "", record.get(time_field) if time_field else None
+
+    for doc, timestamp in nlp.pipe(records(), as_tuples=True, batch_size=batch_size):
+        # The EntityRuler pattern id is the canonical food name
+        yield [ent.ent_id_ or ent.text for ent in doc.ents if ent.label_ == "FILIPINO_FOOD"], timestamp
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Food frequencies, co-occurrence and trends over a corpus.")
+    parser.add_argument("input", help="JSONL corpus, or batch_tagger.py output with --tagged")
+    parser.add_argument("--tagged", action="store_true", help="Input is batch_tagger.py output (no re-tagging)")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--time-field", help="Record field with an ISO date or Unix timestamp")
+    parser.add_argument("--window", choices=list(WINDOW_FORMATS), default="month")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--exact-limit", type=int, default=2000, help="Largest catalog counted exactly")
+    parser.add_argument("--sketch", action="store_true", help="Use the count-min sketch and heavy hitters even for small catalogs")
+    parser.add_argument("--base-model", default="en_core_web_sm")
+    parser.add_argument("-o", "--output", help="Write the summary as JSON")
+    args = parser.parse_args(argv)
+    if args.tagged and args.time_field:
+        parser.error("--time-field can't be used with --tagged: batch_tagger.py output has no timestamps, "
+                     "so run on the raw corpus instead")
+
+    if args.tagged:
+        stream = iter_tagged_foods(args.input, args.time_field)
+    else:
+        stream = iter_corpus_foods(args.input, args.text_field, args.time_field, args.base_model)
+    analytics = FoodAnalytics(exact_limit=args.exact_limit, window=args.window if args.time_field else None,
+                              sketch=args.sketch)
+    for foods, timestamp in stream:
+        analytics.add(foods, timestamp)
+
+    summary = analytics.summary(args.top)
+    print(f"{summary['docs']} documents, {summary['mentions']} food mentions ({summary['mode']} counts)")
+    print("\nTop foods:")
+    for food, count in summary["top_foods"]:
+        print(f"  {count:>8}  {food}")
+    print("\nTop pairs (documents mentioning both):")
+    for (food_a, food_b), count in summary["top_pairs"]:
+        print(f"  {count:>8}  {food_a} + {food_b}")
+    for key, foods in summary["top_per_window"].items():
+        print(f"\n{key}: " + ", ".join(f"{food} ({count})" for food, count in foods))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"\nSummary saved to {args.output}", file=sys.stderr)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
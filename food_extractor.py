@@ -0,0 +1,163 @@
+# food_extractor.py
+import re
+import sys
+import time
+from collections import Counter
+from filipino_food_config import FilipinoFoodNER, iter_canonical_foods, normalize_food_key
+
+# Word characters without underscore; matches what spaCy treats as a token body
+WORD_PATTERN = r"[^\W_]+"
+WORD_RE = re.compile(WORD_PATTERN)
+
+# Between two words of a food name, the gaps the tokenizer turns into adjacent tokens or a lone
+# "-" token: one space, an infix hyphen or a spaced hyphen ("Halo halo", "Halo-halo", "Halo - halo").
+# Any other whitespace (double spaces, tabs, newlines) becomes a whitespace token that breaks the pattern.
+SPACE_GAP = r"(?: - | |-)"
+
+# spaCy splits an underscore off the start or end of a token but not from its middle,
+# so "_adobo_" contains Adobo while "adobo_sinigang" is one token. A hyphen is only split
+# off between two words, so "Adobo-" at the end of a line stays one token.
+WORD_START = r"(?<![^\W_])(?<![^\W_]_)"
+WORD_END = r"(?![^\W_])(?!_[^\W_])(?!-(?![^\W_]))"
+
+
+class FoodExtractor:
+    """
+    Scan raw strings for Filipino foods without building spaCy Docs.
+
+    Food names are compiled into a word-level trie, and the trie into a single
+    case-insensitive regular expression, so each text is scanned in one pass by
+    the C regex engine. Matches must start and end on word boundaries and the
+    longest food at each position wins, mirroring the EntityRuler patterns from
+    build_food_patterns().
+    """
+
+    def __init__(self, foods=None):
+        """foods: iterable of (surface, canonical) pairs; defaults to FILIPINO_FOODS plus variations."""
+        self.canonical = {}
+        trie = {}
+        for surface, canonical in foods if foods is not None else iter_canonical_foods():
+            key = normalize_food_key(surface)
+            if not key or key in self.canonical:
+                continue
+            self.canonical[key] = canonical
+            self._insert(trie, key)
+        self._trie = trie
+        # The look-behind keeps matches from starting mid-word
+        self._regex = re.compile(WORD_START + self._compile(trie), re.IGNORECASE) if trie else None
+
+    def __len__(self):
+        return len(self.canonical)
+
+    @staticmethod
+    def _insert(trie, key):
+        """Add a normalized key to the trie as a word/separator path."""
+        node = trie
+        position = 0
+        for match in WORD_RE.finditer(key):
+            separator = key[position:match.start()]
+            # The first word has no separator; apostrophes ("Sago't") must match literally
+            edge = ((separator.strip() or " ") if separator else "", match.group())
+            node = node.setdefault(edge, {})
+            position = match.end()
+        node[None] = True
+
+    @classmethod
+    def _compile(cls, node):
+        """Turn a trie node into a regex alternation; optional only where a food can end."""
+        alternatives = []
+        for edge, child in sorted((k, v) for k, v in node.items() if k is not None):
+            separator, word = edge
+            if separator == " ":
+                prefix = SPACE_GAP
+            else:
+                prefix = re.escape(separator)
+            alternatives.append(prefix + re.escape(word) + WORD_END + cls._compile(child))
+        if not alternatives:
+            return ""
+        group = "(?:" + "|".join(alternatives) + ")"
+        return group + "?" if None in node else group
+
+    def extract(self, text):
+        """Return (start, end, surface, canonical) tuples for every food in text."""
+        if self._regex is None:
+            return []
+        results = []
+        for match in self._regex.finditer(text):
+            surface = match.group()
+            canonical = self.canonical.get(normalize_food_key(surface))
+            results.append((match.start(), match.end(), surface, canonical))
+        return results
+
+    def extract_many(self, texts):
+        """Yield extract(text) for each text, in order."""
+        for text in texts:
+            yield self.extract(text)
+
+    def count(self, texts):
+        """Count canonical food mentions across many texts."""
+        counts = Counter()
+        for matches in self.extract_many(texts):
+            counts.update(canonical for _, _, _, canonical in matches)
+        return counts
+
+
+def ruler_food_spans(nlp, texts, batch_size=256):
+    """FILIPINO_FOOD spans from a spaCy pipeline in the same tuple format as FoodExtractor."""
+    for doc in nlp.pipe(texts, batch_size=batch_size):
+        yield [
+            (ent.start_char, ent.end_char, ent.text, ent.ent_id_ or ent.text)
+            for ent in doc.ents
+            if ent.label_ == "FILIPINO_FOOD"
+        ]
+
+
+def compare_with_ruler(extractor, nlp, texts):
+    """Return the texts where the extractor and the EntityRuler disagree."""
+    mismatches = []
+    for text, expected, found in zip(texts, ruler_food_spans(nlp, texts), extractor.extract_many(texts)):
+        if expected != found:
+            mismatches.append({"text": text, "ruler": expected, "extractor": found})
+    return mismatches
+
+
+def benchmark(extractor, nlp, texts, batch_size=256):
+    """Time the extractor against nlp.pipe on the same texts and return docs/sec for both."""
+    start = time.perf_counter()
+    for _ in extractor.extract_many(texts):
+        pass
+    extractor_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in nlp.pipe(texts, batch_size=batch_size):
+        pass
+    spacy_seconds = time.perf_counter() - start
+
+    return {
+        "docs": len(texts),
+        "extractor_docs_per_sec": len(texts) / extractor_seconds,
+        "spacy_docs_per_sec": len(texts) / spacy_seconds,
+        "speedup": spacy_seconds / extractor_seconds,
+    }
+
+
+if __name__ == "__main__":
+    base_model = sys.argv[1] if len(sys.argv) > 1 else "en_core_web_sm"
+    ner_model = FilipinoFoodNER(base_model=base_model)
+    nlp = ner_model.load_model_with_ruler()
+    extractor = FoodExtractor()
+
+    food_sentences, non_food_sentences = ner_model.get_evaluation_sentences()
+    evaluation_sentences = food_sentences + non_food_sentences + ner_model.get_sample_texts()
+    mismatches = compare_with_ruler(extractor, nlp, evaluation_sentences)
+    print(f"Compared {len(evaluation_sentences)} evaluation sentences: {len(mismatches)} mismatches")
+    for mismatch in mismatches:
+        print(f"  '{mismatch['text']}'")
+        print(f"    EntityRuler: {mismatch['ruler']}")
+        print(f"    Extractor:   {mismatch['extractor']}")
+
+    corpus = evaluation_sentences * 100
+    results = benchmark(extractor, nlp, corpus)
+    print(f"\nFoodExtractor: {results['extractor_docs_per_sec']:.0f} docs/sec")
+    print(f"load_model_with_ruler(): {results['spacy_docs_per_sec']:.0f} docs/sec")
+    print(f"Speedup: {results['speedup']:.1f}x")
@@ -0,0 +1,327 @@
+# food_index.py
+import argparse
+import json
+import os
+import re
+import tempfile
+from collections import defaultdict
+import numpy as np
+from filipino_food_config import iter_canonical_foods, normalize_food_key
+
+INDEX_VERSION = 1
+MANIFEST = "index.json"
+
+# One posting per mention: segment-local doc number and character offsets
+POSTING_DTYPE = np.dtype([("doc", "<u4"), ("start", "<u4"), ("end", "<u4")])
+
+QUERY_TOKEN = re.compile(r"\(|\)|\bAND\b|\bOR\b|[^()]+?(?=\s*(?:\(|\)|\bAND\b|\bOR\b|$))")
+
+
+def canonical_food_lookup():
+    """Normalized surface form -> canonical food name, covering FILIPINO_FOODS and FILIPINO_FOOD_VARIATIONS."""
+    return {normalize_food_key(surface): canonical for surface, canonical in iter_canonical_foods()}
+
+
+def _write_json_atomic(path, data):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class SegmentWriter:
+    """Accumulates one segment's postings in memory; FoodIndex.append() writes it out."""
+
+    def __init__(self):
+        self.doc_ids = []
+        self.postings = defaultdict(list)
+        self._canonical = canonical_food_lookup()
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def add(self, doc_id, entities):
+        """Add one document's entities (batch_tagger result dicts); only FILIPINO_FOOD spans are indexed."""
+        doc = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        for entity in entities:
+            if entity["label"] != "FILIPINO_FOOD":
+                continue
+            food = self._canonical.get(normalize_food_key(entity["text"]), entity["text"])
+            self.postings[food].append((doc, entity["start"], entity["end"]))
+
+
+class Segment:
+    """A read-only segment: postings memory-mapped from postings.npy, with a small JSON lexicon."""
+
+    def __init__(self, path, base):
+        self.path = path
+        self.base = base
+        with open(os.path.join(path, "lexicon.json"), "r", encoding="utf-8") as f:
+            self.lexicon = json.load(f)
+        self.postings = np.load(os.path.join(path, "postings.npy"), mmap_mode="r")
+        self._doc_ids = None
+
+    def doc_ids(self):
+        if self._doc_ids is None:
+            with open(os.path.join(self.path, "doc_ids.json"), "r", encoding="utf-8") as f:
+                self._doc_ids = json.load(f)
+        return self._doc_ids
+
+    def food_postings(self, food):
+        entry = self.lexicon.get(food)
+        if entry is None:
+            return self.postings[:0]
+        offset, count = entry
+        return self.postings[offset:offset + count]
+
+    def docs_for(self, food):
+        """Global doc numbers mentioning food (postings are sorted by doc)."""
+        return np.unique(self.food_postings(food)["doc"]).astype(np.int64) + self.base
+
+
+class FoodIndex:
+    """
+    On-disk inverted index of FILIPINO_FOOD mentions: canonical food -> (doc, start, end) postings.
+
+    The index is a directory of immutable segments plus an index.json manifest.
+    Appending writes a new segment and then swaps the manifest, so readers
+    always see a complete index. Postings are memory-mapped, so opening an
+    index and answering a query only touches the pages of the queried foods.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.segments = []
+        self.doc_count = 0
+        self._entries = []
+        self._canonical = canonical_food_lookup()
+        self.reload()
+
+    def reload(self):
+        """Pick up segments appended since the index was opened."""
+        manifest_path = os.path.join(self.path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            self.segments, self.doc_count, self._entries = [], 0, []
+            return
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != INDEX_VERSION:
+            raise ValueError(f"{self.path} has index version {manifest.get('version')}, expected {INDEX_VERSION}")
+        known = {segment.path: segment for segment in self.segments}
+        segments = []
+        base = 0
+        for entry in manifest["segments"]:
+            segment_path = os.path.join(self.path, entry["name"])
+            segment = known.get(segment_path) or Segment(segment_path, base)
+            segments.append(segment)
+            base += entry["docs"]
+        self.segments, self.doc_count, self._entries = segments, base, manifest["segments"]
+
+    def source_offset(self, source):
+        """Byte offset up to which the file at source (a real path) has been indexed, 0 if never."""
+        return max((entry["source"]["end"] for entry in self._entries
+                    if entry.get("source", {}).get("path") == source), default=0)
+
+    def append(self, writer, source=None):
+        """
+        Write a SegmentWriter's documents as a new segment. Returns the segment name.
+        source, {"path", "start", "end"}, records which byte range of which file the segment came from.
+        """
+        if not len(writer):
+            return None
+        os.makedirs(self.path, exist_ok=True)
+        self.reload()
+        name = f"segment-{len(self.segments):05d}"
+        segment_path = os.path.join(self.path, name)
+        os.makedirs(segment_path)
+
+        lexicon = {}
+        arrays = []
+        offset = 0
+        for food in sorted(writer.postings):
+            postings = np.array(sorted(writer.postings[food]), dtype=POSTING_DTYPE)
+            lexicon[food] = [offset, len(postings)]
+            arrays.append(postings)
+            offset += len(postings)
+        postings = np.concatenate(arrays) if arrays else np.empty(0, dtype=POSTING_DTYPE)
+        np.save(os.path.join(segment_path, "postings.npy"), postings)
+        _write_json_atomic(os.path.join(segment_path, "lexicon.json"), lexicon)
+        _write_json_atomic(os.path.join(segment_path, "doc_ids.json"), writer.doc_ids)
+
+        entry = {"name": name, "docs": len(writer)}
+        if source is not None:
+            entry["source"] = source
+        entries = self._entries + [entry]
+        _write_json_atomic(os.path.join(self.path, MANIFEST), {"version": INDEX_VERSION, "segments": entries})
+        self.reload()
+        return name
+
+    def foods(self):
+        """Every indexed canonical food with its mention count."""
+        counts = defaultdict(int)
+        for segment in self.segments:
+            for food, (_, count) in segment.lexicon.items():
+                counts[food] += count
+        return dict(counts)
+
+    def docs_for(self, food):
+        if not self.segments:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([segment.docs_for(food) for segment in self.segments])
+
+    def resolve_food(self, name):
+        """Canonical name for a query term ("lechon-kawali" -> "Lechon Kawali"); unknown terms are kept as typed."""
+        key = normalize_food_key(name)
+        canonical = self._canonical.get(key)
+        if canonical:
+            return canonical
+        for food in self.foods():
+            if normalize_food_key(food) == key:
+                return food
+        return name.strip()
+
+    def query(self, expression):
+        """
+        Global doc numbers matching a boolean query over food names, e.g.
+        "Sisig AND Lechon Kawali", "Adobo OR (Sinigang AND Kanin)".
+        AND binds tighter than OR; both keywords must be upper case.
+        """
+        tokens = [token.strip() for token in QUERY_TOKEN.findall(expression) if token.strip()]
+        if not tokens:
+            return np.empty(0, dtype=np.int64)
+        position = 0
+
+        def parse_or():
+            nonlocal position
+            docs = parse_and()
+            while position < len(tokens) and tokens[position] == "OR":
+                position += 1
+                docs = np.union1d(docs, parse_and())
+            return docs
+
+        def parse_and():
+            nonlocal position
+            docs = parse_term()
+            while position < len(tokens) and tokens[position] == "AND":
+                position += 1
+                docs = np.intersect1d(docs, parse_term(), assume_unique=True)
+            return docs
+
+        def parse_term():
+            nonlocal position
+            if position >= len(tokens):
+                raise ValueError(f"Incomplete query: {expression!r}")
+            token = tokens[position]
+            position += 1
+            if token == "(":
+                docs = parse_or()
+                if position >= len(tokens) or tokens[position] != ")":
+                    raise ValueError(f"Missing ')' in query: {expression!r}")
+                position += 1
+                return docs
+            if token in (")", "AND", "OR"):
+                raise ValueError(f"Unexpected '{token}' in query: {expression!r}")
+            return self.docs_for(self.resolve_food(token))
+
+        docs = parse_or()
+        if position != len(tokens):
+            raise ValueError(f"Unexpected '{tokens[position]}' in query: {expression!r}")
+        return docs
+
+    def query_terms(self, expression):
+        """Canonical foods named in a query, for highlighting results."""
+        return [self.resolve_food(token) for token in QUERY_TOKEN.findall(expression)
+                if token.strip() and token.strip() not in ("(", ")", "AND", "OR")]
+
+    def _segment_for(self, doc):
+        for segment in reversed(self.segments):
+            if doc >= segment.base:
+                return segment
+        raise IndexError(doc)
+
+    def document(self, doc, foods=None):
+        """(external doc id, {food: [(start, end), ...]}) for a global doc number, optionally limited to foods."""
+        segment = self._segment_for(doc)
+        local = doc - segment.base
+        mentions = {}
+        for food in foods if foods is not None else segment.lexicon:
+            postings = segment.food_postings(food)
+            # Postings are sorted by doc, so the doc's mentions are one contiguous run
+            lo, hi = np.searchsorted(postings["doc"], [local, local + 1])
+            if hi > lo:
+                mentions[food] = [(int(p["start"]), int(p["end"])) for p in postings[lo:hi]]
+        return segment.doc_ids()[local], mentions
+
+    def search(self, expression, limit=None):
+        """Run a query and return [(doc id, {food: [(start, end), ...]})] for the queried foods."""
+        docs = self.query(expression)
+        if limit is not None:
+            docs = docs[:limit]
+        terms = self.query_terms(expression)
+        return [self.document(int(doc), terms) for doc in docs]
+
+
+def index_tagged_file(tagged_path, index_path, segment_size=100000):
+    """
+    Append batch_tagger.py output (one {"id", "entities"} per line) to an index, segment_size docs per segment.
+    Each segment remembers the file and byte range it came from, so adding the same file
+    again only indexes lines appended since; a file that shrank is rejected.
+    """
+    index = FoodIndex(index_path)
+    source = os.path.realpath(tagged_path)
+    offset = index.source_offset(source)
+    if os.path.getsize(tagged_path) < offset:
+        raise ValueError(f"{tagged_path} is shorter than when it was indexed; rebuild the index instead")
+    writer = SegmentWriter()
+    added = 0
+    segment_start = offset
+    with open(tagged_path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            offset += len(line)
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            writer.add(result["id"], result["entities"])
+            if len(writer) >= segment_size:
+                added += len(writer)
+                index.append(writer, {"path": source, "start": segment_start, "end": offset})
+                writer = SegmentWriter()
+                segment_start = offset
+    added += len(writer)
+    index.append(writer, {"path": source, "start": segment_start, "end": offset})
+    print(f"Indexed {added} documents into {index_path} ({len(index.segments)} segments, {index.doc_count} documents)")
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query an inverted index of Filipino food mentions.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--index", default="food_index", help="Index directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    add_parser = subparsers.add_parser("add", parents=[common], help="Append batch_tagger.py output to the index")
+    add_parser.add_argument("tagged", help="JSONL written by batch_tagger.py")
+    add_parser.add_argument("--segment-size", type=int, default=100000)
+    query_parser = subparsers.add_parser("query", parents=[common], help='Boolean query, e.g. "Sisig AND Lechon Kawali"')
+    query_parser.add_argument("expression")
+    query_parser.add_argument("--limit", type=int, default=20)
+    subparsers.add_parser("foods", parents=[common], help="List indexed foods by mention count")
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        index_tagged_file(args.tagged, args.index, args.segment_size)
+    elif args.command == "query":
+        index = FoodIndex(args.index)
+        docs = index.query(args.expression)
+        print(f"{len(docs)} matching documents")
+        for doc_id, mentions in index.search(args.expression, args.limit):
+            print(json.dumps({"id": doc_id, "mentions": mentions}, ensure_ascii=False))
+    else:
+        for food, count in sorted(FoodIndex(args.index).foods().items(), key=lambda item: -item[1]):
+            print(f"{count:>8}  {food}")
+
+
+if __name__ == "__main__":
+    main()
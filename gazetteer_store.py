@@ -0,0 +1,386 @@
+# gazetteer_store.py
+import argparse
+import csv
+import gc
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import time
+import numpy as np
+import spacy
+from spacy.attrs import LOWER
+from spacy.language import Language
+from spacy.strings import hash_string
+from spacy.tokens import Span
+from filipino_food_config import build_food_patterns, iter_canonical_foods, normalize_food_key
+
+GAZETTEER_VERSION = 1
+GAZETTEER_FILES = ("meta.json", "keys.bin", "key_offsets.npy", "canonical_ids.npy",
+                   "canonicals.bin", "canonical_offsets.npy", "first_tokens.npy")
+
+
+def _write_string_table(strings, bin_path, offsets_path):
+    """Concatenate UTF-8 strings into one file plus an offsets array (n + 1 entries)."""
+    offsets = np.zeros(len(strings) + 1, dtype=np.uint64)
+    with open(bin_path, "wb") as f:
+        position = 0
+        for index, value in enumerate(strings):
+            f.write(value)
+            position += len(value)
+            offsets[index + 1] = position
+    np.save(offsets_path, offsets)
+
+
+def gazetteer_key(doc):
+    """Key for a tokenized, normalized surface form: its lowercased non-space tokens joined by spaces."""
+    return " ".join(token.lower_ for token in doc if not token.is_space)
+
+
+def build_gazetteer(entries, path, nlp=None, label="FILIPINO_FOOD"):
+    """
+    Write (surface, canonical) entries as a memory-mappable gazetteer directory.
+
+    Keys are normalized like the EntityRuler patterns (lowercase, hyphens as
+    spaces), split with the pipeline's tokenizer and stored as one sorted
+    string table, so lookups are binary searches over the mapped file. The
+    hashes of every key's first token (spaCy's LOWER attribute) are stored
+    sorted too, to skip tokens that can't start a match with one vectorized
+    lookup per Doc. The first entry for a key wins.
+    """
+    nlp = nlp or spacy.blank("en")
+    surfaces, canonicals = [], []
+    for surface, canonical in entries:
+        surfaces.append(normalize_food_key(surface))
+        canonicals.append(canonical)
+
+    canonical_ids = {}
+    keys = {}
+    first_tokens = set()
+    max_tokens = 0
+    for doc, canonical in zip(nlp.tokenizer.pipe(surfaces, batch_size=10000), canonicals):
+        key = gazetteer_key(doc)
+        if not key or key.encode("utf-8") in keys:
+            continue
+        tokens = key.split(" ")
+        keys[key.encode("utf-8")] = canonical_ids.setdefault(canonical, len(canonical_ids))
+        first_tokens.add(hash_string(tokens[0]))
+        max_tokens = max(max_tokens, len(tokens))
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    sorted_keys = sorted(keys)
+    _write_string_table(sorted_keys, os.path.join(tmp_path, "keys.bin"), os.path.join(tmp_path, "key_offsets.npy"))
+    np.save(os.path.join(tmp_path, "canonical_ids.npy"), np.array([keys[key] for key in sorted_keys], dtype=np.uint32))
+    _write_string_table([name.encode("utf-8") for name in canonical_ids],
+                        os.path.join(tmp_path, "canonicals.bin"), os.path.join(tmp_path, "canonical_offsets.npy"))
+    np.save(os.path.join(tmp_path, "first_tokens.npy"), np.array(sorted(first_tokens), dtype=np.uint64))
+
+    checksum = hashlib.sha256()
+    with open(os.path.join(tmp_path, "keys.bin"), "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            checksum.update(block)
+    checksum.update(json.dumps(list(canonical_ids)).encode("utf-8"))
+    meta = {"version": GAZETTEER_VERSION, "label": label, "entries": len(sorted_keys),
+            "canonicals": len(canonical_ids), "max_tokens": max_tokens, "checksum": checksum.hexdigest()}
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return meta
+
+
+class Gazetteer:
+    """
+    Read-only view of a gazetteer directory; the string tables are mmapped, nothing is loaded per entry.
+    lookup() tokenizes with nlp's tokenizer (blank English by default), which should be the one the
+    gazetteer was built with.
+    """
+
+    def __init__(self, path, nlp=None):
+        self.path = path
+        self._nlp = nlp
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != GAZETTEER_VERSION:
+            raise ValueError(f"{path} has gazetteer version {self.meta.get('version')}, expected {GAZETTEER_VERSION}")
+        self.label = self.meta["label"]
+        self.max_tokens = self.meta["max_tokens"]
+        self._keys = self._map(os.path.join(path, "keys.bin"))
+        self._key_offsets = np.load(os.path.join(path, "key_offsets.npy"), mmap_mode="r")
+        self._canonical_ids = np.load(os.path.join(path, "canonical_ids.npy"), mmap_mode="r")
+        self._canonicals = self._map(os.path.join(path, "canonicals.bin"))
+        self._canonical_offsets = np.load(os.path.join(path, "canonical_offsets.npy"), mmap_mode="r")
+        self.first_tokens = np.load(os.path.join(path, "first_tokens.npy"), mmap_mode="r")
+        self._canonical_cache = {}
+
+    @staticmethod
+    def _map(file_path):
+        if os.path.getsize(file_path) == 0:
+            return b""
+        with open(file_path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self._key_offsets) - 1
+
+    def key(self, index):
+        return self._keys[int(self._key_offsets[index]):int(self._key_offsets[index + 1])]
+
+    def canonical(self, index):
+        """Canonical name of the entry at index; each distinct name is decoded once."""
+        canonical_id = int(self._canonical_ids[index])
+        name = self._canonical_cache.get(canonical_id)
+        if name is None:
+            start, end = int(self._canonical_offsets[canonical_id]), int(self._canonical_offsets[canonical_id + 1])
+            name = self._canonical_cache[canonical_id] = self._canonicals[start:end].decode("utf-8")
+        return name
+
+    def lower_bound(self, key):
+        """Index of the first entry >= key (bytes)."""
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, text):
+        """Canonical name for a surface form, or None. The key is built exactly as in build_gazetteer."""
+        if self._nlp is None:
+            self._nlp = spacy.blank("en")
+        key = gazetteer_key(self._nlp.make_doc(normalize_food_key(text))).encode("utf-8")
+        index = self.lower_bound(key)
+        if index < len(self) and self.key(index) == key:
+            return self.canonical(index)
+        return None
+
+    def match(self, doc):
+        """
+        Longest, non-overlapping matches as (start, end, canonical) token spans.
+        An optional "-" token may sit between key tokens, like the EntityRuler patterns.
+        """
+        if not len(doc) or not len(self):
+            return []
+        lowers = doc.to_array(LOWER)
+        slots = np.searchsorted(self.first_tokens, lowers)
+        slots[slots == len(self.first_tokens)] = 0
+        candidates = np.nonzero(self.first_tokens[slots] == lowers)[0]
+
+        matches = []
+        last_end = 0
+        for start in candidates.tolist():
+            if start < last_end:
+                continue
+            parts = []
+            best = None
+            position = start
+            while position < len(doc) and len(parts) < self.max_tokens:
+                token = doc[position]
+                if parts and token.text == "-":
+                    position += 1
+                    continue
+                parts.append(token.lower_)
+                prefix = " ".join(parts).encode("utf-8")
+                index = self.lower_bound(prefix)
+                if index == len(self):
+                    break
+                key = self.key(index)
+                if key == prefix:
+                    best = (position + 1, index)
+                elif not key.startswith(prefix + b" "):
+                    # No longer key continues with these tokens
+                    break
+                position += 1
+            if best is not None:
+                end, index = best
+                matches.append((start, end, self.canonical(index)))
+                last_end = end
+        return matches
+
+
+@Language.factory("food_gazetteer", default_config={"path": None, "overwrite": False})
+def create_food_gazetteer(nlp, name, path, overwrite):
+    return FoodGazetteerComponent(nlp, name, path, overwrite)
+
+
+class FoodGazetteerComponent:
+    """
+    Pipeline component that adds gazetteer matches to doc.ents, in place of an EntityRuler.
+    Matches get the gazetteer's label and the canonical name as ent.ent_id_.
+    With overwrite=False, existing entities win over overlapping matches.
+    """
+
+    def __init__(self, nlp, name, path=None, overwrite=False):
+        self.name = name
+        self.nlp = nlp
+        self.overwrite = overwrite
+        self.path = path
+        # spacy.load() builds the component from its saved config, whose path may be gone or
+        # relative to another cwd; from_disk() then opens the copy saved inside the pipeline
+        self.gazetteer = Gazetteer(path, nlp) if path and os.path.exists(os.path.join(path, "meta.json")) else None
+
+    def __call__(self, doc):
+        if self.gazetteer is None:
+            if not self.path:
+                return doc
+            self.gazetteer = Gazetteer(self.path, self.nlp)
+        label = self.gazetteer.label
+        new_spans = [Span(doc, start, end, label=label, span_id=canonical)
+                     for start, end, canonical in self.gazetteer.match(doc)]
+        if not new_spans:
+            return doc
+        covered = set()
+        for span in doc.ents if not self.overwrite else new_spans:
+            covered.update(range(span.start, span.end))
+        if self.overwrite:
+            kept = [ent for ent in doc.ents if not covered.intersection(range(ent.start, ent.end))]
+            doc.ents = sorted(kept + new_spans, key=lambda span: span.start)
+        else:
+            kept = [span for span in new_spans if not covered.intersection(range(span.start, span.end))]
+            doc.ents = sorted(list(doc.ents) + kept, key=lambda span: span.start)
+        return doc
+
+    def to_disk(self, path, exclude=tuple()):
+        """Copy the gazetteer files into the pipeline directory so saved pipelines are self-contained."""
+        os.makedirs(path, exist_ok=True)
+        if self.gazetteer is not None:
+            for file_name in GAZETTEER_FILES:
+                shutil.copyfile(os.path.join(self.gazetteer.path, file_name), os.path.join(path, file_name))
+
+    def from_disk(self, path, exclude=tuple()):
+        if os.path.exists(os.path.join(path, "meta.json")):
+            self.gazetteer = Gazetteer(str(path), self.nlp)
+        return self
+
+
+def read_entries(path, include_builtin=True):
+    """
+    (surface, canonical) pairs from a TSV/CSV ("name[,canonical]") or JSONL ({"name", "canonical"}) file,
+    after the built-in catalog. Entries without a canonical name are their own canonical.
+    """
+    if include_builtin:
+        yield from iter_canonical_foods()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record["name"], record.get("canonical") or record["name"]
+        else:
+            for row in csv.reader(f, delimiter="\t" if path.endswith(".tsv") else ","):
+                if row and row[0].strip():
+                    yield row[0], row[1] if len(row) > 1 and row[1].strip() else row[0]
+
+
+def run_benchmark(sizes=(1000, 10000, 100000, 1000000), output_dir="gazetteer_bench", ruler_limit=10000,
+                  n_docs=2000, seed=0):
+    """
+    For each catalog size: build time, on-disk size, load time, RSS growth on load and docs/sec
+    for the gazetteer, and the same for an EntityRuler up to ruler_limit entries.
+    """
+    from benchmark import build_corpus, synthetic_catalog
+    from model_registry import current_rss_bytes
+
+    texts = build_corpus(3, n_docs, seed)
+    results = []
+    for size in sizes:
+        entries = synthetic_catalog(size, seed)
+        path = os.path.join(output_dir, f"gazetteer-{size}")
+        start = time.perf_counter()
+        build_gazetteer(entries, path)
+        build_seconds = time.perf_counter() - start
+        disk_mb = sum(os.path.getsize(os.path.join(path, name)) for name in GAZETTEER_FILES) / 2**20
+        del entries
+        gc.collect()
+
+        nlp = spacy.blank("en")
+        rss_before = current_rss_bytes() or 0
+        start = time.perf_counter()
+        nlp.add_pipe("food_gazetteer", config={"path": path})
+        load_seconds = time.perf_counter() - start
+        rss_load = ((current_rss_bytes() or 0) - rss_before) / 2**20
+        start = time.perf_counter()
+        matches = sum(len(doc.ents) for doc in nlp.pipe(texts, batch_size=256))
+        docs_per_sec = len(texts) / (time.perf_counter() - start)
+        rss_after_run = ((current_rss_bytes() or 0) - rss_before) / 2**20
+        result = {"entries": size, "store": "gazetteer", "build_seconds": build_seconds, "disk_mb": disk_mb,
+                  "load_seconds": load_seconds, "rss_load_mb": rss_load, "rss_after_run_mb": rss_after_run,
+                  "docs_per_sec": docs_per_sec, "matches": matches}
+        results.append(result)
+        print_result(result)
+        del nlp
+        gc.collect()
+
+        if size <= ruler_limit:
+            nlp = spacy.blank("en")
+            rss_before = current_rss_bytes() or 0
+            start = time.perf_counter()
+            ruler = nlp.add_pipe("entity_ruler")
+            ruler.add_patterns(build_food_patterns(nlp, synthetic_catalog(size, seed)))
+            load_seconds = time.perf_counter() - start
+            rss_load = ((current_rss_bytes() or 0) - rss_before) / 2**20
+            start = time.perf_counter()
+            matches = sum(len(doc.ents) for doc in nlp.pipe(texts, batch_size=256))
+            docs_per_sec = len(texts) / (time.perf_counter() - start)
+            result = {"entries": size, "store": "entity_ruler", "build_seconds": None, "disk_mb": None,
+                      "load_seconds": load_seconds, "rss_load_mb": rss_load,
+                      "rss_after_run_mb": ((current_rss_bytes() or 0) - rss_before) / 2**20,
+                      "docs_per_sec": docs_per_sec, "matches": matches}
+            results.append(result)
+            print_result(result)
+            del nlp, ruler
+            gc.collect()
+    return results
+
+
+def print_result(result):
+    build = f"{result['build_seconds']:.1f}s" if result["build_seconds"] is not None else "-"
+    disk = f"{result['disk_mb']:.1f}" if result["disk_mb"] is not None else "-"
+    print(f"{result['entries']:>9} {result['store']:<13} build {build:>7}  disk {disk:>6} MB  "
+          f"load {result['load_seconds']:.3f}s  RSS {result['rss_load_mb']:+.1f} MB "
+          f"({result['rss_after_run_mb']:+.1f} after run)  {result['docs_per_sec']:.0f} docs/sec  "
+          f"{result['matches']} matches")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build, query and benchmark memory-mapped food gazetteers.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Build a gazetteer from a TSV/CSV/JSONL name list")
+    build_parser.add_argument("input", help="name[,canonical] rows (TSV/CSV) or {name, canonical} lines (JSONL)")
+    build_parser.add_argument("output", help="Gazetteer directory")
+    build_parser.add_argument("--no-builtin", action="store_true", help="Don't include FILIPINO_FOODS and variations")
+    build_parser.add_argument("--base-model", help="Tokenize keys with this model's tokenizer (default: blank English)")
+    lookup_parser = subparsers.add_parser("lookup", help="Look up surface forms")
+    lookup_parser.add_argument("gazetteer")
+    lookup_parser.add_argument("names", nargs="+")
+    lookup_parser.add_argument("--base-model", help="Model whose tokenizer built the gazetteer (default: blank English)")
+    bench_parser = subparsers.add_parser("benchmark", help="Compare gazetteer and EntityRuler across catalog sizes")
+    bench_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    bench_parser.add_argument("--ruler-limit", type=int, default=10000, help="Largest size also run with an EntityRuler")
+    bench_parser.add_argument("--output-dir", default="gazetteer_bench")
+    bench_parser.add_argument("-o", "--output", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        nlp = spacy.load(args.base_model) if args.base_model else None
+        meta = build_gazetteer(read_entries(args.input, not args.no_builtin), args.output, nlp)
+        print(f"Wrote {meta['entries']} entries ({meta['canonicals']} canonical names) to {args.output}")
+    elif args.command == "lookup":
+        gazetteer = Gazetteer(args.gazetteer, spacy.load(args.base_model) if args.base_model else None)
+        for name in args.names:
+            print(f"{name} -> {gazetteer.lookup(name)}")
+    else:
+        results = run_benchmark(args.sizes, args.output_dir, args.ruler_limit)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
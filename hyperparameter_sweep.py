@@ -0,0 +1,253 @@
+# hyperparameter_sweep.py
+import argparse
+import csv
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Environment variables read by the BLAS/OpenMP libraries when a worker process starts
+THREAD_ENV_VARS = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "BLIS_NUM_THREADS"]
+
+DEFAULT_SPACE = {
+    "dropout": [0.1, 0.2, 0.3, 0.4],
+    "batch_size": [4, 8, 16, 32],
+    "iterations": [10, 20, 30],
+}
+
+TRAINERS = ("custom", "docbin")
+
+
+def grid_candidates(space):
+    """Every combination of the listed values."""
+    names = sorted(space)
+    for values in itertools.product(*(space[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def random_candidates(space, n_candidates, seed=0):
+    """
+    n_candidates random draws. A list is sampled uniformly; a dict
+    {"low": ..., "high": ..., "log": bool, "int": bool} is sampled from that range.
+    """
+    rng = random.Random(seed)
+    for _ in range(n_candidates):
+        params = {}
+        for name, choices in sorted(space.items()):
+            if isinstance(choices, dict):
+                low, high = choices["low"], choices["high"]
+                if choices.get("log"):
+                    value = math.exp(rng.uniform(math.log(low), math.log(high)))
+                else:
+                    value = rng.uniform(low, high)
+                params[name] = int(round(value)) if choices.get("int") else value
+            else:
+                params[name] = rng.choice(choices)
+        yield params
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def as_training_tuples(records):
+    """{text, entities} records as the (text, {"entities": [...]}) tuples train_custom_model expects."""
+    return [(record["text"], {"entities": [tuple(entity) for entity in record["entities"]]}) for record in records]
+
+
+def _limit_threads(n_threads):
+    """Worker initializer: cap BLAS threads so parallel candidates don't oversubscribe the CPU."""
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(limits=n_threads)
+
+
+def train_candidate(candidate_id, params, trainer, train_path, dev_path, output_dir, base_model, seed=0):
+    """
+    Train one candidate in a worker process and score it on the dev set with the span-level evaluator.
+    Models left in the candidate's directory by an earlier sweep are deleted first, since both
+    trainers would otherwise reuse them.
+    """
+    import spacy
+    from filipino_food_config import FilipinoFoodNER
+    from span_evaluation import evaluate_spans
+
+    train_records = read_jsonl(train_path)
+    dev_records = read_jsonl(dev_path)
+    model_dir = os.path.join(output_dir, f"candidate-{candidate_id:03d}")
+    for stale_dir in (model_dir, f"{model_dir}_checkpoint"):
+        shutil.rmtree(stale_dir, ignore_errors=True)
+
+    start = time.perf_counter()
+    if trainer == "custom":
+        FilipinoFoodNER(base_model=base_model, cache_dir=None).train_custom_model(
+            as_training_tuples(train_records),
+            iterations=params.get("iterations", 30),
+            output_dir=model_dir,
+            dev_data=as_training_tuples(dev_records),
+            batch_size=params.get("batch_size", 8),
+            dropout=params.get("dropout", 0.3),
+            eval_every=params.get("eval_every", 20),
+            patience=params.get("patience", 5),
+            seed=seed,
+        )
+    else:
+        from ner_model import train_and_save_model
+        train_and_save_model(
+            train_records,
+            n_iter=params.get("iterations", 30),
+            batch_size=params.get("batch_size"),
+            dropout=params.get("dropout", 0.2),
+            seed=seed,
+            output_dir=model_dir,
+        )
+    train_seconds = time.perf_counter() - start
+
+    nlp = spacy.load(model_dir)
+    gold = ((r["text"], {"entities": r["entities"]}) for r in dev_records)
+    scores = evaluate_spans(nlp, gold, labels=["FILIPINO_FOOD"]).scores()
+    return {
+        "candidate": candidate_id,
+        "params": params,
+        "f1": scores["exact"]["f1"],
+        "precision": scores["exact"]["precision"],
+        "recall": scores["exact"]["recall"],
+        "partial_f1": scores["partial"]["f1"],
+        "train_seconds": train_seconds,
+        "model_dir": model_dir,
+    }
+
+
+def default_data(output_dir, dev_split=0.2, seed=0):
+    """Write the built-in training examples to train/dev JSONL files and return their paths."""
+    from filipino_food_config import FilipinoFoodNER
+    records = [
+        {"text": text, "entities": [list(entity) for entity in annotations["entities"]]}
+        for text, annotations in FilipinoFoodNER(cache_dir=None).create_training_data()
+    ]
+    random.Random(seed).shuffle(records)
+    n_dev = max(1, int(len(records) * dev_split))
+    train_path = os.path.join(output_dir, "train.jsonl")
+    dev_path = os.path.join(output_dir, "dev.jsonl")
+    write_jsonl(train_path, records[n_dev:])
+    write_jsonl(dev_path, records[:n_dev])
+    return train_path, dev_path
+
+
+def write_leaderboard(results, output_dir):
+    """Save results best-first as leaderboard.csv and leaderboard.json."""
+    ranked = sorted(results, key=lambda result: result["f1"], reverse=True)
+    param_names = sorted({name for result in ranked for name in result["params"]})
+    csv_path = os.path.join(output_dir, "leaderboard.csv")
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "candidate", "f1", "precision", "recall", "partial_f1", "train_seconds"] + param_names)
+        for rank, result in enumerate(ranked, start=1):
+            writer.writerow(
+                [rank, result["candidate"], round(result["f1"], 4), round(result["precision"], 4),
+                 round(result["recall"], 4), round(result["partial_f1"], 4), round(result["train_seconds"], 1)]
+                + [result["params"].get(name) for name in param_names]
+            )
+    with open(os.path.join(output_dir, "leaderboard.json"), "w", encoding="utf-8") as f:
+        json.dump(ranked, f, indent=2)
+    return csv_path
+
+
+def run_sweep(candidates, trainer="custom", train_path=None, dev_path=None, output_dir="sweep_results",
+              n_workers=None, threads_per_worker=1, base_model="en_core_web_sm", seed=0):
+    """
+    Train every candidate in a process pool and return the results best-first.
+    Each worker is limited to threads_per_worker BLAS threads, so n_workers * threads_per_worker
+    should not exceed the number of cores. seed fixes the default train/dev split and each
+    candidate's training order.
+    """
+    if trainer not in TRAINERS:
+        raise ValueError(f"Unknown trainer '{trainer}'. Choose from: {', '.join(TRAINERS)}")
+    os.makedirs(output_dir, exist_ok=True)
+    if train_path is None or dev_path is None:
+        train_path, dev_path = default_data(output_dir, seed=seed)
+    n_workers = n_workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+
+    # Inherited by the freshly spawned workers before numpy/BLAS load; restored afterwards
+    saved_env = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads_per_worker)
+
+    candidates = list(candidates)
+    print(f"Training {len(candidates)} candidates with {n_workers} workers x {threads_per_worker} threads")
+    results = []
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=context,
+                                 initializer=_limit_threads, initargs=(threads_per_worker,)) as executor:
+            futures = {
+                executor.submit(train_candidate, candidate_id, params, trainer, train_path, dev_path, output_dir,
+                                base_model, seed): params
+                for candidate_id, params in enumerate(candidates)
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Candidate {futures[future]} failed: {e}")
+                    continue
+                results.append(result)
+                print(f"Candidate {result['candidate']}: F1 {result['f1']:.3f} in {result['train_seconds']:.0f}s {result['params']}")
+    finally:
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    leaderboard = write_leaderboard(results, output_dir)
+    print(f"Leaderboard saved to {leaderboard}")
+    return sorted(results, key=lambda result: result["f1"], reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep for the CuisiNER NER trainers.")
+    parser.add_argument("--trainer", choices=TRAINERS, default="custom",
+                        help="'custom' = FilipinoFoodNER.train_custom_model, 'docbin' = ner_model.train_and_save_model")
+    parser.add_argument("--space", help="JSON file with the search space (default: dropout/batch_size/iterations grid)")
+    parser.add_argument("--search", choices=("grid", "random"), default="grid")
+    parser.add_argument("--n-candidates", type=int, default=20, help="Draws for random search")
+    parser.add_argument("--train", help="Training JSONL ({text, entities}); default: built-in examples")
+    parser.add_argument("--dev", help="Dev JSONL for scoring; default: held out from the built-in examples")
+    parser.add_argument("--output-dir", default="sweep_results")
+    parser.add_argument("--workers", type=int, help="Parallel training processes (default: cores / threads)")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--base-model", default="en_core_web_sm", help="Base model for the 'custom' trainer")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for random search, the default dev split and training")
+    args = parser.parse_args(argv)
+
+    if args.space:
+        with open(args.space, "r", encoding="utf-8") as f:
+            space = json.load(f)
+    else:
+        space = DEFAULT_SPACE
+    if args.search == "grid":
+        candidates = grid_candidates(space)
+    else:
+        candidates = random_candidates(space, args.n_candidates, args.seed)
+
+    run_sweep(candidates, args.trainer, args.train, args.dev, args.output_dir,
+              args.workers, args.threads_per_worker, args.base_model, args.seed)
+
+
+if __name__ == "__main__":
+    main()
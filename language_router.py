@@ -0,0 +1,126 @@
+# language_router.py
+import argparse
+import itertools
+import json
+import re
+import sys
+from spacy.lang.en.stop_words import STOP_WORDS as ENGLISH_STOP_WORDS
+from spacy.lang.tl.stop_words import STOP_WORDS as TAGALOG_STOP_WORDS
+from batch_tagger import SUPPORTED_FORMATS, doc_to_entities, read_records
+from model_registry import default_registry
+
+# Everyday Tagalog function words missing from spaCy's list (particles, pronouns, Taglish fillers)
+TAGALOG_EXTRA_WORDS = {
+    "po", "opo", "naman", "lang", "rin", "ba", "kasi", "yung", "si", "mo", "kayo", "natin", "nang",
+    "talaga", "sobrang", "nga", "eh", "diba", "ganun", "ganito", "dun", "kumain", "kain", "tapos",
+}
+
+# Words that are stop words in both languages say nothing about which one a text is in
+AMBIGUOUS_WORDS = (ENGLISH_STOP_WORDS & TAGALOG_STOP_WORDS) | {"a", "i"}
+ENGLISH_WORDS = frozenset(ENGLISH_STOP_WORDS - AMBIGUOUS_WORDS)
+TAGALOG_WORDS = frozenset((TAGALOG_STOP_WORDS | TAGALOG_EXTRA_WORDS) - AMBIGUOUS_WORDS)
+
+WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+
+def tagalog_share(text):
+    """
+    Share of the recognised stop words in text that are Tagalog (0.0-1.0),
+    or None when the text has no stop words from either language.
+    """
+    english = tagalog = 0
+    for match in WORD.finditer(text.lower()):
+        word = match.group()
+        if word in TAGALOG_WORDS:
+            tagalog += 1
+        elif word in ENGLISH_WORDS:
+            english += 1
+    if not english and not tagalog:
+        return None
+    return tagalog / (english + tagalog)
+
+
+class LanguageRouter:
+    """
+    Sends each text to the English or Tagalog pipeline, based on stop words.
+
+    Texts whose Tagalog share reaches tagalog_threshold go to the "tl"
+    pipeline and everything else (including texts with no stop words) to "en",
+    so Taglish lands on whichever language dominates. Pipelines come from a
+    ModelRegistry and are loaded the first time a text is routed to them.
+    """
+
+    def __init__(self, registry, english_model="en", tagalog_model="tl", tagalog_threshold=0.5):
+        self.registry = registry
+        self.english_model = english_model
+        self.tagalog_model = tagalog_model
+        self.tagalog_threshold = tagalog_threshold
+
+    def route(self, text):
+        """Name of the registry model that should process text."""
+        share = tagalog_share(text)
+        if share is not None and share >= self.tagalog_threshold:
+            return self.tagalog_model
+        return self.english_model
+
+    def pipe(self, texts, batch_size=64, as_tuples=False, window=1024, n_process=1):
+        """
+        Like nlp.pipe, with each text processed by the pipeline route() picks; check doc.lang_ to see which.
+        Texts are read window at a time, grouped by model and run through one
+        nlp.pipe call per model, so no text is processed by both pipelines and
+        at most window Docs are held while the window is put back in input order.
+        """
+        iterator = iter(texts)
+        while True:
+            chunk = list(itertools.islice(iterator, window))
+            if not chunk:
+                return
+            groups = {}
+            for index, item in enumerate(chunk):
+                text = item[0] if as_tuples else item
+                groups.setdefault(self.route(text), []).append(index)
+
+            docs = [None] * len(chunk)
+            for model_name, indices in groups.items():
+                nlp = self.registry.get(model_name)
+                group_texts = (chunk[index][0] if as_tuples else chunk[index] for index in indices)
+                for index, doc in zip(indices, nlp.pipe(group_texts, batch_size=batch_size, n_process=n_process)):
+                    docs[index] = doc
+            if as_tuples:
+                yield from ((doc, context) for doc, (_, context) in zip(docs, chunk))
+            else:
+                yield from docs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tag a mixed English/Tagalog corpus, routing each document to one pipeline.")
+    parser.add_argument("input", help="Path to the input corpus")
+    parser.add_argument("-o", "--output", help="Output JSONL path (default: stdout)")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, help="Input format (default: from file extension)")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threshold", type=float, default=0.5, help="Tagalog stop-word share at which a text goes to 'tl'")
+    parser.add_argument("--budget-mb", type=float, help="Memory budget for loaded pipelines")
+    parser.add_argument("--base-model", default="en_core_web_sm")
+    args = parser.parse_args(argv)
+
+    router = LanguageRouter(default_registry(args.budget_mb, args.base_model), tagalog_threshold=args.threshold)
+    records = read_records(args.input, args.format, args.text_field, args.id_field)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    counts = {}
+    try:
+        for doc, record_id in router.pipe(records, batch_size=args.batch_size, as_tuples=True):
+            counts[doc.lang_] = counts.get(doc.lang_, 0) + 1
+            result = {"id": record_id, "language": doc.lang_, "entities": doc_to_entities(doc)}
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print("Routed " + ", ".join(f"{count} to {language}" for language, count in counts.items()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
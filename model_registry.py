@@ -0,0 +1,195 @@
+# model_registry.py
+import argparse
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+import spacy
+from filipino_food_config import FilipinoFoodNER
+from ner_model import MODEL_DIR
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+TAGALOG_MODEL = "tl_calamancy_md-0.1.0"
+
+
+def current_rss_bytes():
+    """Resident set size of this process, or None where it can't be read."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Lazily loaded pipelines with a memory budget.
+
+    Pipelines are registered by name with a zero-argument loader and only
+    loaded on the first get(). The RSS growth during each load is recorded as
+    that model's footprint; when the footprints add up to more than
+    memory_budget_mb, the least recently used pipelines are dropped. Loads are
+    serialized so one model's allocations are never attributed to another.
+    """
+
+    def __init__(self, memory_budget_mb=None):
+        self.memory_budget_mb = memory_budget_mb
+        self._loaders = {}
+        self._models = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def register(self, name, loader):
+        """Register a zero-argument callable that returns a loaded nlp object."""
+        with self._lock:
+            self._loaders[name] = loader
+            self._stats.setdefault(name, {"loads": 0, "hits": 0, "evictions": 0, "footprint_mb": None,
+                                          "load_seconds": None, "last_used": None})
+
+    def register_path(self, name, path, **load_kwargs):
+        """Register a pipeline loaded with spacy.load(path, **load_kwargs)."""
+        self.register(name, lambda: spacy.load(path, **load_kwargs))
+
+    def __contains__(self, name):
+        return name in self._loaders
+
+    def names(self):
+        return list(self._loaders)
+
+    def loaded(self):
+        """Names of the pipelines currently in memory, least recently used first."""
+        with self._lock:
+            return list(self._models)
+
+    def get(self, name):
+        """Return the pipeline called name, loading it (and evicting others) if needed."""
+        nlp = self._touch(name)
+        if nlp is not None:
+            return nlp
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model '{name}'. Registered: {', '.join(self._loaders) or 'none'}")
+
+        with self._load_lock:
+            # Another thread may have loaded it while we waited
+            nlp = self._touch(name)
+            if nlp is not None:
+                return nlp
+            gc.collect()
+            rss_before = current_rss_bytes()
+            start = time.perf_counter()
+            nlp = self._loaders[name]()
+            load_seconds = time.perf_counter() - start
+            rss_after = current_rss_bytes()
+
+            with self._lock:
+                stats = self._stats[name]
+                stats["loads"] += 1
+                stats["load_seconds"] = load_seconds
+                stats["last_used"] = time.time()
+                if rss_before is not None and rss_after is not None:
+                    # A reload can reuse pages freed by an earlier eviction and look smaller; keep the largest estimate
+                    footprint_mb = max(rss_after - rss_before, 0) / 2**20
+                    stats["footprint_mb"] = max(footprint_mb, stats["footprint_mb"] or 0.0)
+                self._models[name] = nlp
+                evicted = self._evict_over_budget(keep=name)
+
+        if evicted:
+            # Free the dropped pipelines now rather than at the next collection
+            gc.collect()
+            print(f"Evicted {', '.join(evicted)} to stay within {self.memory_budget_mb} MB")
+        return nlp
+
+    def _touch(self, name):
+        with self._lock:
+            nlp = self._models.get(name)
+            if nlp is not None:
+                self._models.move_to_end(name)
+                self._stats[name]["hits"] += 1
+                self._stats[name]["last_used"] = time.time()
+            return nlp
+
+    def _evict_over_budget(self, keep):
+        """Drop least recently used pipelines until the footprints fit the budget. Caller holds _lock."""
+        evicted = []
+        if self.memory_budget_mb is None:
+            return evicted
+        for name in list(self._models):
+            if self.memory_used_mb() <= self.memory_budget_mb:
+                break
+            if name == keep:
+                continue
+            del self._models[name]
+            self._stats[name]["evictions"] += 1
+            evicted.append(name)
+        return evicted
+
+    def memory_used_mb(self):
+        """Sum of the recorded footprints of the loaded pipelines."""
+        return sum(self._stats[name]["footprint_mb"] or 0.0 for name in self._models)
+
+    def evict(self, name):
+        """Drop a pipeline from memory; it is reloaded on the next get()."""
+        with self._lock:
+            if self._models.pop(name, None) is None:
+                return False
+            self._stats[name]["evictions"] += 1
+        gc.collect()
+        return True
+
+    def stats(self):
+        """Per-model load/hit/eviction counts and footprints, plus the totals against the budget."""
+        with self._lock:
+            return {
+                "memory_budget_mb": self.memory_budget_mb,
+                "memory_used_mb": self.memory_used_mb(),
+                "rss_mb": (current_rss_bytes() or 0) / 2**20,
+                "loaded": list(self._models),
+                "models": {name: dict(stats) for name, stats in self._stats.items()},
+            }
+
+
+def default_registry(memory_budget_mb=None, base_model="en_core_web_sm"):
+    """
+    Registry with the pipelines this project serves:
+    "en" (FilipinoFoodNER, foods+ner profile), "en-full" (full profile),
+    "tl" (calamancy Tagalog model) and "custom" (ner_model.MODEL_DIR, if trained).
+    """
+    registry = ModelRegistry(memory_budget_mb)
+    registry.register("en", lambda: FilipinoFoodNER(base_model=base_model, profile="foods+ner").load_model_with_ruler())
+    registry.register("en-full", lambda: FilipinoFoodNER(base_model=base_model, profile="full").load_model_with_ruler())
+    registry.register_path("tl", TAGALOG_MODEL)
+    if os.path.isdir(MODEL_DIR):
+        registry.register_path("custom", MODEL_DIR)
+    return registry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load pipelines through the model registry and report their footprints.")
+    parser.add_argument("models", nargs="+", help="Model names to load in order (en, en-full, tl, custom)")
+    parser.add_argument("--budget-mb", type=float, help="Memory budget for loaded pipelines")
+    parser.add_argument("--base-model", default="en_core_web_sm")
+    args = parser.parse_args(argv)
+
+    registry = default_registry(args.budget_mb, args.base_model)
+    for name in args.models:
+        registry.get(name)
+    stats = registry.stats()
+    for name, model_stats in stats["models"].items():
+        if model_stats["loads"]:
+            footprint = model_stats["footprint_mb"] or 0.0
+            print(f"{name:<10} loads={model_stats['loads']} hits={model_stats['hits']} "
+                  f"evictions={model_stats['evictions']} footprint={footprint:.1f} MB "
+                  f"load={model_stats['load_seconds']:.2f}s")
+    print(f"Loaded: {', '.join(stats['loaded'])} ({stats['memory_used_mb']:.1f} MB tracked, RSS {stats['rss_mb']:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.metrics import confusion_matrix, classification_report, precision_recall_fscore_support
-from filipino_food_config import FilipinoFoodNER, FILIPINO_FOODS
+from filipino_food_config import FilipinoFoodNER
 
 def nerEvaluator():
     """Simple NER evaluation with 117 test samples (67 Filipino foods + 50 non-foods)."""
@@ -14,28 +14,7 @@ def nerEvaluator():
     nlp = ner_model.load_model_with_ruler()
     
     # Test data: 67 Filipino foods + 50 non-food sentences
-    filipino_food_sentences = [f"I love eating {food}." for food in FILIPINO_FOODS]
-    
-    non_food_sentences = [
-        "I went to the store today.", "John works at Microsoft.", "The meeting is in Manila.",
-        "She bought a new car.", "The weather is nice.", "Pizza and pasta for dinner.",
-        "I love sushi and ramen.", "Coffee and donuts this morning.", "Basketball game tonight.",
-        "Reading a good book.", "Maria lives in Cebu.", "The conference starts at 9 AM.",
-        "Google launched a new product.", "I visited New York last year.", "The movie was great.",
-        "He graduated from UP.", "Apple released the iPhone.", "Traffic is heavy today.",
-        "I need to buy groceries.", "The flight to Japan is delayed.", "She works as a doctor.",
-        "The restaurant is expensive.", "I downloaded a new app.", "Christmas is next month.",
-        "The exam is on Friday.", "Samsung makes good phones.", "I called my mother yesterday.",
-        "The concert was amazing.", "Tesla stock went up.", "I'm reading Harry Potter.",
-        "The gym is closed today.", "Facebook changed its name.", "I bought new shoes.",
-        "The wedding is in December.", "Netflix has good shows.", "I learned to cook pasta.",
-        "The beach was crowded.", "Amazon delivered my package.", "I took a taxi home.",
-        "The hotel room was clean.", "YouTube has funny videos.", "I planted some flowers.",
-        "The airplane was delayed.", "Instagram updated its features.", "I visited my grandmother.",
-        "The library is quiet.", "Microsoft Office is useful.", "I watched a documentary.",
-        "The park is beautiful.", "Twitter has breaking news.", "I bought concert tickets.",
-        "The school is nearby.", "LinkedIn job posting.", "I studied mathematics."
-    ]
+    filipino_food_sentences, non_food_sentences = ner_model.get_evaluation_sentences()
     
     # Combine test data (67 Filipino foods + 50 completely non-food sentences)
     all_sentences = filipino_food_sentences + non_food_sentences
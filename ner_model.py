@@ -1,12 +1,38 @@
 import random
+import time
+from contextlib import nullcontext
 import spacy
 from spacy.tokens import DocBin
-from spacy.util import filter_spans
+from spacy.training import Example
+from spacy.util import compounding, filter_spans, minibatch
 from tqdm import tqdm
 import os
 import json
 
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # optional: only needed to cap/raise BLAS threads during training
+    threadpool_limits = None
+
 MODEL_DIR = "custom_ner_model"
+SHARD_DIR = "corpus_shards"
+
+def make_annotated_doc(nlp, text, labels):
+    """
+    Tokenize text and attach its [start, end, label] entities.
+    Returns (doc, misaligned) where misaligned lists the entities that don't map onto tokens.
+    """
+    doc = nlp.make_doc(text)
+    ents = []
+    misaligned = []
+    for start, end, label in labels:
+        span = doc.char_span(start, end, label=label, alignment_mode="contract")
+        if span is None:
+            misaligned.append({"text": text, "start": start, "end": end, "label": label, "span": text[start:end]})
+        else:
+            ents.append(span)
+    doc.ents = filter_spans(ents)
+    return doc, misaligned
 
 def create_docbin(training_data):
     """
@@ -17,29 +43,75 @@ def create_docbin(training_data):
     doc_bin = DocBin()
 
     for example in tqdm(training_data, desc="Creating DocBin"):
-        text = example["text"]
-        labels = example["entities"]
-        doc = nlp.make_doc(text)
-        ents = []
-        for start, end, label in labels:
-            span = doc.char_span(start, end, label=label, alignment_mode="contract")
-            if span is None:
-                print(f"Skipping misaligned entity: '{text[start:end]}'")
-            else:
-                ents.append(span)
-        filtered_ents = filter_spans(ents)
-        doc.ents = filtered_ents
+        doc, misaligned = make_annotated_doc(nlp, example["text"], example["entities"])
+        for entity in misaligned:
+            print(f"Skipping misaligned entity: '{entity['span']}'")
         doc_bin.add(doc)
 
     return doc_bin
 
-def train_and_save_model(training_data, n_iter=30):
+def iter_shard_paths(shard_dir):
+    """Sorted .spacy shard files in shard_dir."""
+    return sorted(
+        os.path.join(shard_dir, name) for name in os.listdir(shard_dir) if name.endswith(".spacy")
+    )
+
+def iter_shard_examples(nlp, shard_dir, shuffle=False):
+    """
+    Lazily yield training Examples from sharded DocBin files, one shard in memory at a time.
+    With shuffle=True the shard order and the docs within each shard are shuffled.
+    """
+    shard_paths = iter_shard_paths(shard_dir)
+    if shuffle:
+        random.shuffle(shard_paths)
+    for shard_path in shard_paths:
+        docs = list(DocBin().from_disk(shard_path).get_docs(nlp.vocab))
+        if shuffle:
+            random.shuffle(docs)
+        for doc in docs:
+            yield Example(nlp.make_doc(doc.text), doc)
+
+def batch_size_schedule(batch_size=None, start=4.0, stop=32.0, compound=1.001):
+    """
+    Minibatch sizes for training: a fixed int, or (by default) sizes that
+    compound from `start` up to `stop` so early updates are small and later ones cheap.
+    """
+    if batch_size:
+        return batch_size
+    return compounding(start, stop, compound)
+
+def run_training(nlp, optimizer, epoch_examples, n_iter=30, batch_size=None, dropout=0.2, n_threads=None):
+    """
+    Minibatch training loop shared by the in-memory and sharded trainers.
+    epoch_examples() is called once per epoch and may return any iterable of Examples.
+    Compounding batch sizes keep growing across epochs rather than restarting each one.
+    """
+    sizes = batch_size_schedule(batch_size)
+    if n_threads and threadpool_limits is None:
+        print("threadpoolctl is not installed; ignoring n_threads")
+    with threadpool_limits(limits=n_threads) if n_threads and threadpool_limits else nullcontext():
+        for epoch in range(n_iter):
+            losses = {}
+            n_words = 0
+            start_time = time.perf_counter()
+            for batch in minibatch(epoch_examples(), size=sizes):
+                nlp.update(batch, sgd=optimizer, drop=dropout, losses=losses)
+                n_words += sum(len(example.reference) for example in batch)
+            elapsed = time.perf_counter() - start_time
+            print(f"Epoch {epoch+1}, Losses: {losses}, {n_words / elapsed:.0f} words/sec")
+    return nlp
+
+def train_and_save_model(training_data, n_iter=30, batch_size=None, dropout=0.2, n_threads=None, seed=0,
+                         output_dir=MODEL_DIR):
     """
     Train a custom NER model using DocBin training.
+    Examples are built once from the DocBin and updated in minibatches; pass an int
+    batch_size for fixed batches or leave it None for compounding sizes (4 -> 32).
+    n_threads caps the BLAS thread pool when threadpoolctl is installed.
     """
-    if os.path.exists(MODEL_DIR):
-        print(f"Model directory '{MODEL_DIR}' exists. Loading existing model.")
-        return spacy.load(MODEL_DIR)
+    if os.path.exists(output_dir):
+        print(f"Model directory '{output_dir}' exists. Loading existing model.")
+        return spacy.load(output_dir)
 
     # Blank English model
     nlp = spacy.blank("en")
@@ -55,29 +127,58 @@ def train_and_save_model(training_data, n_iter=30):
         for start, end, label in example["entities"]:
             ner.add_label(label)
 
-    # Create DocBin
+    # Create DocBin and build Examples once (the DocBin docs already carry the gold entities)
     doc_bin = create_docbin(training_data)
-    docs = list(doc_bin.get_docs(nlp.vocab))
+    examples = [Example(nlp.make_doc(doc.text), doc) for doc in doc_bin.get_docs(nlp.vocab)]
 
     # Begin training
-    optimizer = nlp.begin_training()
+    random.seed(seed)
+    optimizer = nlp.initialize(lambda: examples)
 
-    for epoch in range(n_iter):
-        losses = {}
-        random.shuffle(docs)
-        for doc in docs:
-            example = spacy.training.Example.from_dict(doc, {"entities": [(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents]})
-            nlp.update([example], sgd=optimizer, drop=0.2, losses=losses)
-        print(f"Epoch {epoch+1}, Losses: {losses}")
+    def epoch_examples():
+        random.shuffle(examples)
+        return examples
+
+    run_training(nlp, optimizer, epoch_examples, n_iter, batch_size, dropout, n_threads)
 
     # Save model
-    nlp.to_disk(MODEL_DIR)
-    print(f"Model trained and saved at '{MODEL_DIR}'")
+    nlp.to_disk(output_dir)
+    print(f"Model trained and saved at '{output_dir}'")
+    return nlp
+
+def train_from_shards(shard_dir, n_iter=30, batch_size=None, dropout=0.2, n_threads=None, seed=0,
+                      output_dir=MODEL_DIR):
+    """
+    Train a custom NER model from sharded DocBin files (see corpus_builder.py).
+    Shards are read lazily every epoch, so peak memory is one shard regardless of corpus size.
+    """
+    if os.path.exists(output_dir):
+        print(f"Model directory '{output_dir}' exists. Loading existing model.")
+        return spacy.load(output_dir)
+    if not iter_shard_paths(shard_dir):
+        raise ValueError(f"No .spacy shards found in '{shard_dir}'")
+
+    nlp = spacy.blank("en")
+    nlp.add_pipe("ner")
+
+    # initialize() streams the shards once to collect the entity labels
+    random.seed(seed)
+    optimizer = nlp.initialize(lambda: iter_shard_examples(nlp, shard_dir))
+
+    run_training(
+        nlp, optimizer, lambda: iter_shard_examples(nlp, shard_dir, shuffle=True),
+        n_iter, batch_size, dropout, n_threads,
+    )
+
+    nlp.to_disk(output_dir)
+    print(f"Model trained and saved at '{output_dir}'")
     return nlp
 
 def load_model():
     """
-    Load trained NER model or train new one using Corona2.json data.
+    Load trained NER model or train new one using Corona2.jsonl / Corona2.json data.
+    Corona2.jsonl (one example per line) is streamed into DocBin shards and
+    trained on lazily; Corona2.json is loaded into memory as before.
     Returns:
         spacy.language.Language: Loaded or newly trained NER model
     Raises:
@@ -87,6 +188,12 @@ def load_model():
         print(f"Loading existing model from {MODEL_DIR}")
         return spacy.load(MODEL_DIR)
     
+    if os.path.exists("Corona2.jsonl"):
+        from corpus_builder import build_shards
+        if not (os.path.isdir(SHARD_DIR) and iter_shard_paths(SHARD_DIR)):
+            build_shards("Corona2.jsonl", SHARD_DIR)
+        return train_from_shards(SHARD_DIR)
+    
     try:
         with open("Corona2.json", "r", encoding="utf-8") as f:
             training_data = json.load(f)
@@ -0,0 +1,246 @@
+# ner_service.py
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from batch_tagger import doc_to_entities
+from filipino_food_config import FilipinoFoodNER, PIPELINE_PROFILES
+from pipeline_timing import PipelineTimer
+from result_cache import ResultCache
+
+
+class MicroBatcher:
+    """
+    Group concurrent requests into one nlp.pipe call.
+
+    Requests wait at most max_wait_ms for company, or until max_batch_size
+    documents are collected, whichever comes first. A single request with more
+    texts than that is still run through nlp.pipe in max_batch_size chunks.
+    The queue is bounded: submit() raises queue.Full instead of letting
+    latency grow without limit.
+    """
+
+    def __init__(self, nlp, max_batch_size=32, max_wait_ms=5.0, max_queue_size=256, cache=None):
+        self.nlp = nlp
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, texts):
+        """Queue a list of texts; returns a Future resolving to one entity list per text."""
+        future = Future()
+        self._queue.put_nowait((texts, future))
+        return future
+
+    def queue_size(self):
+        return self._queue.qsize()
+
+    def close(self):
+        self._stopped.set()
+        self._worker.join(timeout=1.0)
+
+    def _collect_batch(self):
+        """Block for the first request, then gather more until the batch is full or the wait expires."""
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        doc_count = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while doc_count < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            doc_count += len(item[0])
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                entities = self._process(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            position = 0
+            for request_texts, future in batch:
+                future.set_result(entities[position:position + len(request_texts)])
+                position += len(request_texts)
+
+    def _process(self, texts):
+        """Entity lists for texts; with a cache, one bulk lookup and only the misses go through nlp."""
+        results = self.cache.get_many(texts) if self.cache is not None else {}
+        missing = [index for index in range(len(texts)) if index not in results]
+        if missing:
+            docs = self.nlp.pipe([texts[index] for index in missing], batch_size=min(len(missing), self.max_batch_size))
+            computed = {index: doc_to_entities(doc) for index, doc in zip(missing, docs)}
+            if self.cache is not None:
+                self.cache.put_many((texts[index], entities) for index, entities in computed.items())
+            results.update(computed)
+        return [results[index] for index in range(len(texts))]
+
+
+class NERRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints: POST /ner, GET /health and (with timings enabled) GET /stats."""
+
+    server_version = "CuisiNER/1.0"
+
+    def do_GET(self):
+        if self.path == "/health":
+            health = {"status": "ok", "queue_size": self.server.batcher.queue_size()}
+            if self.server.batcher.cache is not None:
+                health["cache"] = self.server.batcher.cache.stats()
+            self._send_json(200, health)
+        elif self.path == "/stats":
+            if self.server.timer is None:
+                self._send_json(404, {"error": "Timings are disabled; start the service with --timings"})
+            else:
+                self._send_json(200, self.server.timer.snapshot())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/ner":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {"error": "Request body must be valid JSON"})
+            return
+
+        # Accept either {"text": "..."} or {"texts": ["...", ...]}
+        if not isinstance(payload, dict):
+            self._send_json(400, {"error": "Request body must be a JSON object"})
+            return
+        single = "text" in payload
+        texts = [payload["text"]] if single else payload.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            self._send_json(400, {"error": "Provide 'text' (string) or 'texts' (list of strings)"})
+            return
+        if not texts:
+            self._send_json(200, {"results": []})
+            return
+
+        try:
+            future = self.server.batcher.submit(texts)
+        except queue.Full:
+            self._send_json(503, {"error": "Server busy, retry later"}, headers={"Retry-After": "1"})
+            return
+
+        try:
+            results = future.result(timeout=self.server.request_timeout)
+        except FutureTimeoutError:
+            self._send_json(504, {"error": "Timed out waiting for the NER pipeline"})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"NER pipeline error: {str(e)}"})
+            return
+
+        if single:
+            self._send_json(200, {"entities": results[0]})
+        else:
+            self._send_json(200, {"results": [{"entities": entities} for entities in results]})
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class NERHTTPServer(ThreadingHTTPServer):
+    """Threaded server with a listen backlog sized for bursts of concurrent clients."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def create_server(nlp, host="127.0.0.1", port=8000, max_batch_size=32, max_wait_ms=5.0,
+                  max_queue_size=256, request_timeout=30.0, quiet=False, timings=False, sock=None, cache=None):
+    """
+    Build a threaded HTTP server whose handlers share one MicroBatcher.
+    With timings=True the pipeline is wrapped in a PipelineTimer and GET /stats reports it.
+    Pass an already listening sock to serve on it instead of binding host:port
+    (pre-fork workers all accept from the parent's socket), and a ResultCache
+    to answer repeat texts without running the pipeline.
+    """
+    if sock is None:
+        server = NERHTTPServer((host, port), NERRequestHandler)
+    else:
+        server = NERHTTPServer(sock.getsockname()[:2], NERRequestHandler, bind_and_activate=False)
+        server.socket.close()
+        server.socket = sock
+    server.timer = PipelineTimer(nlp) if timings else None
+    if server.timer is not None:
+        nlp = server.timer
+    server.batcher = MicroBatcher(nlp, max_batch_size, max_wait_ms, max_queue_size, cache)
+    server.request_timeout = request_timeout
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve CuisiNER over HTTP with dynamic micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=32, help="Maximum documents per nlp.pipe call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="How long a request waits for others to batch with")
+    parser.add_argument("--max-queue-size", type=int, default=256, help="Queued requests before returning 503")
+    parser.add_argument("--request-timeout", type=float, default=30.0, help="Seconds before a request returns 504")
+    parser.add_argument("--base-model", default="en_core_web_sm", help="Base spaCy model")
+    parser.add_argument("--profile", choices=list(PIPELINE_PROFILES), default="foods+ner", help="Pipeline profile")
+    parser.add_argument("--quiet", action="store_true", help="Don't log each request")
+    parser.add_argument("--timings", action="store_true", help="Record per-component timings, served at GET /stats")
+    parser.add_argument("--cache", help="SQLite result cache shared with batch_tagger.py --cache")
+    parser.add_argument("--cache-max-mb", type=float, help="Evict least recently used cached results beyond this size")
+    args = parser.parse_args(argv)
+
+    ner_model = FilipinoFoodNER(base_model=args.base_model, profile=args.profile)
+    nlp = ner_model.load_model_with_ruler()
+    cache = ResultCache(args.cache, ner_model.pipeline_fingerprint(), args.cache_max_mb) if args.cache else None
+    server = create_server(
+        nlp, args.host, args.port, args.max_batch_size, args.max_wait_ms,
+        args.max_queue_size, args.request_timeout, args.quiet, args.timings, cache=cache,
+    )
+    print(f"CuisiNER service listening on http://{args.host}:{args.port} (POST /ner, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
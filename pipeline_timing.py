@@ -0,0 +1,118 @@
+# pipeline_timing.py
+import threading
+import time
+from spacy.util import minibatch
+
+
+class PipelineTimer:
+    """
+    Opt-in timing wrapper around a loaded pipeline.
+
+    Use it wherever an nlp object is expected: it runs the tokenizer and each
+    component in nlp.pipeline itself, recording wall time, call counts and token
+    counts per component. Everything else is delegated to the wrapped pipeline.
+    The cost is two perf_counter() calls per component per batch.
+    """
+
+    def __init__(self, nlp):
+        self.nlp = nlp
+        self._lock = threading.Lock()
+        # Each thread (Streamlit session, HTTP handler) sees its own last request
+        self._local = threading.local()
+        self.reset()
+
+    def __getattr__(self, name):
+        return getattr(self.nlp, name)
+
+    def reset(self):
+        """Clear the accumulated totals."""
+        with self._lock:
+            self._totals = {}
+            self._requests = 0
+            self._last_any = None
+
+    def clear_last(self):
+        """Forget this thread's last breakdown, e.g. before a call that may be served from a cache."""
+        self._local.last = None
+
+    def last(self):
+        """Breakdown of the most recent call made from the current thread, or None."""
+        return getattr(self._local, "last", None)
+
+    def __call__(self, text, disable=(), component_cfg=None):
+        return next(self.pipe([text], batch_size=1, disable=disable, component_cfg=component_cfg))
+
+    def pipe(self, texts, batch_size=1000, as_tuples=False, n_process=1, disable=(), component_cfg=None):
+        """
+        Like nlp.pipe, timing each component per batch. Multiprocess runs are passed through untimed.
+        disable skips components and component_cfg passes per-component keyword arguments, as in nlp.pipe.
+        """
+        if n_process != 1:
+            yield from self.nlp.pipe(texts, batch_size=batch_size, as_tuples=as_tuples, n_process=n_process,
+                                     disable=disable, component_cfg=component_cfg)
+            return
+        component_cfg = component_cfg or {}
+
+        for batch in minibatch(texts, batch_size):
+            if as_tuples:
+                batch_texts = [text for text, _ in batch]
+                contexts = [context for _, context in batch]
+            else:
+                batch_texts = batch
+
+            timings = {}
+            start = time.perf_counter()
+            docs = [self.nlp.make_doc(text) for text in batch_texts]
+            timings["tokenizer"] = time.perf_counter() - start
+
+            for name, proc in self.nlp.pipeline:
+                if name in disable:
+                    continue
+                proc_kwargs = dict(component_cfg.get(name, {}))
+                start = time.perf_counter()
+                if hasattr(proc, "pipe"):
+                    proc_kwargs.setdefault("batch_size", batch_size)
+                    docs = list(proc.pipe(docs, **proc_kwargs))
+                else:
+                    proc_kwargs.pop("batch_size", None)
+                    docs = [proc(doc, **proc_kwargs) for doc in docs]
+                timings[name] = time.perf_counter() - start
+
+            self._record(timings, docs)
+            if as_tuples:
+                yield from zip(docs, contexts)
+            else:
+                yield from docs
+
+    def _record(self, timings, docs):
+        token_counts = [len(doc) for doc in docs]
+        total_tokens = sum(token_counts)
+        last = {
+            "docs": len(docs),
+            "tokens_per_doc": token_counts,
+            "total_ms": sum(timings.values()) * 1000,
+            "components_ms": {name: seconds * 1000 for name, seconds in timings.items()},
+        }
+        self._local.last = last
+        with self._lock:
+            self._last_any = last
+            self._requests += 1
+            for name, seconds in timings.items():
+                stats = self._totals.setdefault(name, {"calls": 0, "seconds": 0.0, "docs": 0, "tokens": 0})
+                stats["calls"] += 1
+                stats["seconds"] += seconds
+                stats["docs"] += len(docs)
+                stats["tokens"] += total_tokens
+
+    def snapshot(self):
+        """
+        Totals per component since the last reset(), plus the last breakdown:
+        this thread's if it made a call, otherwise the most recent from any thread.
+        """
+        with self._lock:
+            components = {}
+            for name, stats in self._totals.items():
+                components[name] = dict(stats)
+                components[name]["mean_ms_per_call"] = stats["seconds"] * 1000 / stats["calls"]
+                components[name]["us_per_token"] = stats["seconds"] * 1e6 / stats["tokens"] if stats["tokens"] else 0.0
+            return {"batches": self._requests, "components": components, "last": self.last() or self._last_any}
@@ -0,0 +1,188 @@
+# prefork_server.py
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from filipino_food_config import FilipinoFoodNER, PIPELINE_PROFILES
+from ner_service import create_server
+from result_cache import ResultCache
+
+# smaps_rollup fields reported per worker, in kB
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_memory(pid):
+    """
+    RSS, PSS and shared/private memory of a process in kB, from /proc/<pid>/smaps_rollup.
+    PSS splits shared pages between the processes that map them, so the sum of
+    the workers' PSS is what the pool actually costs. Returns None if unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    memory = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        if name in MEMORY_FIELDS:
+            memory[name] = int(value.split()[0])
+    memory["Shared"] = memory.get("Shared_Clean", 0) + memory.get("Shared_Dirty", 0)
+    memory["Private"] = memory.get("Private_Clean", 0) + memory.get("Private_Dirty", 0)
+    return memory
+
+
+def print_memory_report(parent_pid, worker_pids):
+    """One line per process: RSS, PSS, shared and private MB."""
+    total_pss = 0
+    print(f"{'process':<16}{'RSS MB':>10}{'PSS MB':>10}{'shared MB':>11}{'private MB':>12}")
+    for label, pid in [("parent", parent_pid)] + [(f"worker {pid}", pid) for pid in worker_pids]:
+        memory = read_memory(pid)
+        if memory is None:
+            print(f"{label:<16}{'n/a':>10}")
+            continue
+        total_pss += memory["Pss"]
+        print(f"{label:<16}{memory['Rss'] / 1024:>10.1f}{memory['Pss'] / 1024:>10.1f}"
+              f"{memory['Shared'] / 1024:>11.1f}{memory['Private'] / 1024:>12.1f}")
+    print(f"{'total PSS':<16}{'':>10}{total_pss / 1024:>10.1f}")
+
+
+def prepare_shared_pipeline(nlp, warmup_texts):
+    """
+    Finish every lazy allocation in the parent, then freeze the heap.
+    Running the pipeline once fills the vocab and string store with what
+    warm-up touches; gc.freeze() moves all objects to the permanent generation
+    so the children's collections don't write to (and copy) the shared pages.
+    """
+    for _ in nlp.pipe(warmup_texts):
+        pass
+    gc.collect()
+    gc.freeze()
+
+
+def run_worker(nlp, sock, server_kwargs, cache_spec=None):
+    """
+    Serve requests from the shared listening socket until SIGTERM. Never returns.
+    cache_spec is (path, fingerprint, max_mb) for a ResultCache shared by all workers.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # The batcher thread and the SQLite connection are created here, after the fork,
+    # because neither threads nor SQLite connections survive fork()
+    cache = ResultCache(*cache_spec) if cache_spec else None
+    server = create_server(nlp, sock=sock, cache=cache, **server_kwargs)
+    status = 0
+    try:
+        server.serve_forever()
+    except SystemExit:
+        pass
+    except Exception as e:
+        print(f"Worker {os.getpid()} crashed: {e}", file=sys.stderr)
+        status = 1
+    finally:
+        server.batcher.close()
+        if cache is not None:
+            cache.close()
+        # Skip the parent's atexit handlers and buffered output
+        os._exit(status)
+
+
+def serve(nlp, host="127.0.0.1", port=8000, workers=4, report_interval=60.0, warmup_texts=(), cache_spec=None,
+          **server_kwargs):
+    """
+    Bind once, fork workers sharing nlp copy-on-write, and restart any that die.
+    A memory report for the parent and every worker is printed every
+    report_interval seconds (0 disables it) and on shutdown. With cache_spec
+    (path, fingerprint, max_mb), every worker opens the same SQLite result
+    cache; WAL mode lets them read and write it concurrently.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Pre-fork serving needs os.fork(); use ner_service.py on this platform")
+
+    prepare_shared_pipeline(nlp, list(warmup_texts) or ["Warm-up sentence with Adobo and Sinigang in Manila."])
+    sock = socket.create_server((host, port), backlog=128)
+    worker_pids = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            run_worker(nlp, sock, server_kwargs, cache_spec)
+        worker_pids.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+    print(f"CuisiNER pre-fork service listening on http://{host}:{port} with {workers} workers "
+          f"(parent {os.getpid()})")
+
+    next_report = time.monotonic() + report_interval
+    try:
+        while not stopping:
+            time.sleep(0.5)
+            # Reap and replace workers that exited
+            while worker_pids:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+                if pid == 0:
+                    break
+                worker_pids.discard(pid)
+                if not stopping:
+                    print(f"Worker {pid} exited with status {status}; starting a replacement", file=sys.stderr)
+                    spawn()
+            if report_interval and time.monotonic() >= next_report:
+                print_memory_report(os.getpid(), sorted(worker_pids))
+                next_report = time.monotonic() + report_interval
+    finally:
+        print_memory_report(os.getpid(), sorted(worker_pids))
+        for pid in worker_pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in worker_pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve CuisiNER from pre-forked workers sharing one loaded pipeline.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--report-interval", type=float, default=60.0, help="Seconds between memory reports (0 = only on exit)")
+    parser.add_argument("--max-batch-size", type=int, default=32, help="Maximum documents per nlp.pipe call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="How long a request waits for others to batch with")
+    parser.add_argument("--max-queue-size", type=int, default=256, help="Queued requests per worker before returning 503")
+    parser.add_argument("--request-timeout", type=float, default=30.0, help="Seconds before a request returns 504")
+    parser.add_argument("--base-model", default="en_core_web_sm", help="Base spaCy model")
+    parser.add_argument("--profile", choices=list(PIPELINE_PROFILES), default="foods+ner", help="Pipeline profile")
+    parser.add_argument("--quiet", action="store_true", help="Don't log each request")
+    parser.add_argument("--cache", help="SQLite result cache shared by the workers and batch_tagger.py --cache")
+    parser.add_argument("--cache-max-mb", type=float, help="Evict least recently used cached results beyond this size")
+    args = parser.parse_args(argv)
+
+    ner_model = FilipinoFoodNER(base_model=args.base_model, profile=args.profile)
+    nlp = ner_model.load_model_with_ruler()
+    serve(
+        nlp, args.host, args.port, args.workers, args.report_interval,
+        warmup_texts=ner_model.get_sample_texts(),
+        cache_spec=(args.cache, ner_model.pipeline_fingerprint(), args.cache_max_mb) if args.cache else None,
+        max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms, max_queue_size=args.max_queue_size,
+        request_timeout=args.request_timeout, quiet=args.quiet,
+    )
+
+
+if __name__ == "__main__":
+    main()
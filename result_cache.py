@@ -0,0 +1,166 @@
+# result_cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# SQLite's default limit on bound parameters per statement is 999 in older builds
+MAX_PARAMS = 900
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent cache of entity results in a SQLite file.
+
+    Rows are keyed by (pipeline fingerprint, text hash) and hold the JSON
+    entity list that batch_tagger.doc_to_entities() produced, so a hit never
+    touches nlp. Lookups and inserts work on whole batches (one IN query per
+    900 texts). When max_mb is set, the least recently used rows are deleted
+    once the stored results grow past it; rows from other fingerprints age
+    out the same way. Row counts and sizes are kept per fingerprint in a
+    small table by triggers, so checking them costs the same however many
+    rows are stored, and every process sharing the file sees the same totals.
+    """
+
+    def __init__(self, path, fingerprint, max_mb=None):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.max_bytes = int(max_mb * 2**20) if max_mb else None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # WAL lets a nightly job and the service share the file
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " fingerprint TEXT NOT NULL, text_hash TEXT NOT NULL, entities TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (fingerprint, text_hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        with self._conn:
+            # Taken before reading the schema so two processes opening the file don't both migrate it
+            self._conn.execute("BEGIN IMMEDIATE")
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(cache_size)")]
+            if columns and "fingerprint" not in columns:
+                # Older caches kept a single total for all fingerprints
+                for trigger in ("results_size_insert", "results_size_update", "results_size_delete"):
+                    self._conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                self._conn.execute("DROP TABLE cache_size")
+            if "fingerprint" not in columns:
+                self._conn.execute(
+                    "CREATE TABLE cache_size (fingerprint TEXT PRIMARY KEY,"
+                    " entries INTEGER NOT NULL, total INTEGER NOT NULL)"
+                )
+                # Caches written before the size table existed are summed once here
+                self._conn.execute(
+                    "INSERT INTO cache_size SELECT fingerprint, COUNT(*), SUM(size) FROM results GROUP BY fingerprint"
+                )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS results_size_insert AFTER INSERT ON results BEGIN"
+                " INSERT INTO cache_size VALUES (new.fingerprint, 1, new.size) ON CONFLICT (fingerprint)"
+                " DO UPDATE SET entries = entries + 1, total = total + excluded.total; END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS results_size_update AFTER UPDATE OF size ON results BEGIN"
+                " UPDATE cache_size SET total = total + new.size - old.size WHERE fingerprint = new.fingerprint; END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS results_size_delete AFTER DELETE ON results BEGIN"
+                " UPDATE cache_size SET entries = entries - 1, total = total - old.size"
+                " WHERE fingerprint = old.fingerprint; END"
+            )
+        if self.max_bytes is not None:
+            # The file may have been filled under a larger limit
+            self._evict()
+
+    def get_many(self, texts):
+        """Return {index: entities} for the texts that are cached; the rest are misses."""
+        hashes = [text_hash(text) for text in texts]
+        unique = list(dict.fromkeys(hashes))
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique), MAX_PARAMS):
+                chunk = unique[start:start + MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, entities FROM results WHERE fingerprint = ? AND text_hash IN ({placeholders})",
+                    [self.fingerprint] + chunk,
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    hit_hashes = [row[0] for row in rows]
+                    self._conn.execute(
+                        f"UPDATE results SET last_used = ? WHERE fingerprint = ? "
+                        f"AND text_hash IN ({','.join('?' * len(hit_hashes))})",
+                        [now, self.fingerprint] + hit_hashes,
+                    )
+            self._conn.commit()
+            results = {index: json.loads(found[h]) for index, h in enumerate(hashes) if h in found}
+            self.hits += len(results)
+            self.misses += len(texts) - len(results)
+        return results
+
+    def put_many(self, items):
+        """Store (text, entities) pairs, then evict if the cache is over its size limit."""
+        now = time.time()
+        rows = []
+        for text, entities in items:
+            encoded = json.dumps(entities, ensure_ascii=False)
+            rows.append((self.fingerprint, text_hash(text), encoded, len(encoded), now))
+        if not rows:
+            return
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete wouldn't fire the size trigger
+            self._conn.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?) ON CONFLICT (fingerprint, text_hash) DO UPDATE SET"
+                " entities = excluded.entities, size = excluded.size, last_used = excluded.last_used",
+                rows,
+            )
+            self._conn.commit()
+            if self.max_bytes is not None:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used rows until the stored results fit max_bytes. Caller holds _lock."""
+        total = self._conn.execute("SELECT COALESCE(SUM(total), 0) FROM cache_size").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        doomed = []
+        for rowid, size in self._conn.execute("SELECT rowid, size FROM results ORDER BY last_used"):
+            doomed.append(rowid)
+            excess -= size
+            if excess <= 0:
+                break
+        for start in range(0, len(doomed), MAX_PARAMS):
+            chunk = doomed[start:start + MAX_PARAMS]
+            self._conn.execute(f"DELETE FROM results WHERE rowid IN ({','.join('?' * len(chunk))})", chunk)
+        self._conn.commit()
+
+    def clear(self):
+        """Delete every cached result for every fingerprint."""
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entries, total FROM cache_size WHERE fingerprint = ?", [self.fingerprint]
+            ).fetchone()
+            entries, size = row or (0, 0)
+            return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,183 @@
+# span_evaluation.py
+import argparse
+import csv
+import json
+import time
+from collections import defaultdict
+import spacy
+from filipino_food_config import FilipinoFoodNER, iter_canonical_foods, normalize_food_key
+
+
+def load_gold_jsonl(path):
+    """
+    Stream gold examples from JSONL, one {"text": ..., "entities": [[start, end, label], ...]}
+    object per line (the same shape ner_model.create_docbin expects).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["text"], {"entities": [tuple(entity) for entity in record.get("entities", [])]}
+
+
+def default_gold_set():
+    """Gold examples from create_training_data() plus the evaluation sentences, with computed offsets."""
+    ner_model = FilipinoFoodNER(cache_dir=None)
+    gold = list(ner_model.create_training_data())
+    food_sentences, non_food_sentences = ner_model.get_evaluation_sentences()
+    prefix = "I love eating "
+    for sentence in food_sentences:
+        start = len(prefix)
+        gold.append((sentence, {"entities": [(start, len(sentence) - 1, "FILIPINO_FOOD")]}))
+    for sentence in non_food_sentences:
+        gold.append((sentence, {"entities": []}))
+    return gold
+
+
+def _prf(tp_pred, n_pred, tp_gold, n_gold):
+    """Precision from matched predictions, recall from matched gold spans."""
+    precision = tp_pred / n_pred if n_pred else 0.0
+    recall = tp_gold / n_gold if n_gold else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+class SpanScorer:
+    """
+    Accumulates exact and partial (overlap) span matches per label, like
+    spaCy's Scorer for ents, plus per-food detection counts for FILIPINO_FOOD.
+    labels restricts scoring to those labels; None scores every label seen.
+    """
+
+    def __init__(self, labels=None):
+        self.labels = set(labels) if labels else None
+        self.counts = defaultdict(lambda: {"gold": 0, "pred": 0, "exact": 0, "partial_pred": 0, "partial_gold": 0})
+        self.per_food = defaultdict(lambda: {"total": 0, "exact": 0, "partial": 0})
+        self.docs = 0
+        self._canonical = {normalize_food_key(surface): canonical for surface, canonical in iter_canonical_foods()}
+
+    def _keep(self, label):
+        return self.labels is None or label in self.labels
+
+    def score(self, text, gold_spans, doc):
+        """Compare one Doc's entities with its gold (start, end, label) spans."""
+        self.docs += 1
+        gold = {(start, end, label) for start, end, label in gold_spans if self._keep(label)}
+        pred = {(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents if self._keep(ent.label_)}
+
+        for start, end, label in gold:
+            stats = self.counts[label]
+            stats["gold"] += 1
+            overlaps = any(p_label == label and p_start < end and start < p_end for p_start, p_end, p_label in pred)
+            if overlaps:
+                stats["partial_gold"] += 1
+            if label == "FILIPINO_FOOD":
+                surface = text[start:end]
+                food = self._canonical.get(normalize_food_key(surface), surface)
+                self.per_food[food]["total"] += 1
+                self.per_food[food]["exact"] += (start, end, label) in pred
+                self.per_food[food]["partial"] += overlaps
+
+        for start, end, label in pred:
+            stats = self.counts[label]
+            stats["pred"] += 1
+            if (start, end, label) in gold:
+                stats["exact"] += 1
+            if any(g_label == label and g_start < end and start < g_end for g_start, g_end, g_label in gold):
+                stats["partial_pred"] += 1
+
+    def scores(self):
+        """Per-label and micro-averaged exact/partial precision, recall and F1."""
+        per_label = {}
+        totals = {"gold": 0, "pred": 0, "exact": 0, "partial_pred": 0, "partial_gold": 0}
+        for label, stats in sorted(self.counts.items()):
+            per_label[label] = {
+                "support": stats["gold"],
+                "predicted": stats["pred"],
+                "exact": _prf(stats["exact"], stats["pred"], stats["exact"], stats["gold"]),
+                "partial": _prf(stats["partial_pred"], stats["pred"], stats["partial_gold"], stats["gold"]),
+            }
+            for key in totals:
+                totals[key] += stats[key]
+        return {
+            "docs": self.docs,
+            "per_label": per_label,
+            "exact": _prf(totals["exact"], totals["pred"], totals["exact"], totals["gold"]),
+            "partial": _prf(totals["partial_pred"], totals["pred"], totals["partial_gold"], totals["gold"]),
+        }
+
+    def write_per_food_csv(self, path):
+        """Per-food detection results in the filipino_food_test_results.csv layout."""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Food", "Detection Count", "Total Tests", "Success Rate"])
+            for food, stats in sorted(self.per_food.items()):
+                rate = stats["exact"] / stats["total"] if stats["total"] else 0.0
+                writer.writerow([food, stats["exact"], stats["total"], round(rate, 4)])
+
+
+def evaluate_spans(nlp, gold_examples, batch_size=256, n_process=1, labels=None):
+    """
+    Score a pipeline against gold examples of the form (text, {"entities": [(start, end, label), ...]}).
+    Examples are streamed through nlp.pipe with the gold spans riding along as
+    context, so arbitrarily large gold sets are never held in memory at once.
+    """
+    scorer = SpanScorer(labels)
+    stream = ((text, annotations["entities"]) for text, annotations in gold_examples)
+    for doc, gold_spans in nlp.pipe(stream, as_tuples=True, batch_size=batch_size, n_process=n_process):
+        scorer.score(doc.text, gold_spans, doc)
+    return scorer
+
+
+def print_report(scores):
+    print(f"\n{'='*50}")
+    print("SPAN-LEVEL EVALUATION")
+    print("="*50)
+    print(f"Documents: {scores['docs']}")
+    for label, result in scores["per_label"].items():
+        exact, partial = result["exact"], result["partial"]
+        print(f"\n{label} (support {result['support']}, predicted {result['predicted']})")
+        print(f"  Exact   - Precision: {exact['precision']:.3f}, Recall: {exact['recall']:.3f}, F1: {exact['f1']:.3f}")
+        print(f"  Partial - Precision: {partial['precision']:.3f}, Recall: {partial['recall']:.3f}, F1: {partial['f1']:.3f}")
+    print(f"\nMicro-averaged exact F1: {scores['exact']['f1']:.3f}, partial F1: {scores['partial']['f1']:.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Span-level evaluation of the CuisiNER pipeline.")
+    parser.add_argument("gold", nargs="?", help="Gold JSONL (text + [start, end, label] entities); default: built-in set")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--labels", default="FILIPINO_FOOD", help="Comma-separated labels to score, or 'all'")
+    parser.add_argument("--model", help="Path to a trained pipeline to evaluate instead of load_model_with_ruler()")
+    parser.add_argument("--base-model", default="en_core_web_sm")
+    parser.add_argument("--per-food-csv", help="Optional per-food results CSV")
+    parser.add_argument("-o", "--output", help="Optional JSON file for the scores")
+    args = parser.parse_args(argv)
+
+    if args.model:
+        nlp = spacy.load(args.model)
+    else:
+        nlp = FilipinoFoodNER(base_model=args.base_model).load_model_with_ruler()
+    gold = load_gold_jsonl(args.gold) if args.gold else default_gold_set()
+    labels = None if args.labels == "all" else args.labels.split(",")
+
+    start = time.perf_counter()
+    scorer = evaluate_spans(nlp, gold, args.batch_size, args.n_process, labels)
+    elapsed = time.perf_counter() - start
+
+    scores = scorer.scores()
+    print_report(scores)
+    print(f"Scored {scores['docs']} documents in {elapsed:.1f}s ({scores['docs'] / elapsed:.0f} docs/sec)")
+
+    if args.per_food_csv:
+        scorer.write_per_food_csv(args.per_food_csv)
+        print(f"Per-food results saved to {args.per_food_csv}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(scores, f, indent=2)
+        print(f"Scores saved to {args.output}")
+    return scores
+
+
+if __name__ == "__main__":
+    main()
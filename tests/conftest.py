@@ -0,0 +1,17 @@
+import os
+import sys
+import pytest
+import spacy
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filipino_food_config import build_food_patterns  # noqa: E402
+
+
+@pytest.fixture
+def ruler_nlp():
+    """Blank English pipeline with the food EntityRuler; a fresh one per test, since tests add pipes."""
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns(build_food_patterns(nlp))
+    return nlp
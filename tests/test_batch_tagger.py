@@ -0,0 +1,15 @@
+import io
+import pytest
+from batch_tagger import iter_file_records
+
+
+@pytest.mark.parametrize("line", ["[1, 2]", '"Adobo"', "3", "null"])
+def test_non_object_jsonl_line_is_a_value_error(line):
+    f = io.StringIO('{"text": "Adobo"}\n' + line + "\n")
+    with pytest.raises(ValueError, match="line 2"):
+        list(iter_file_records(f, "jsonl"))
+
+
+def test_null_jsonl_id_falls_back_to_line_number():
+    f = io.StringIO('{"text": "Adobo", "id": null}\n{"text": "Sisig", "id": 0}\n{"text": "Pancit"}\n')
+    assert list(iter_file_records(f, "jsonl")) == [("Adobo", 1), ("Sisig", 0), ("Pancit", 3)]
@@ -0,0 +1,29 @@
+import os
+import spacy
+from filipino_food_config import FilipinoFoodNER, catalog_fingerprint
+
+
+def test_retraining_a_directory_base_model_changes_the_cache_key(tmp_path):
+    model_dir = str(tmp_path / "custom_ner_model")
+    spacy.blank("en").to_disk(model_dir)
+    before = catalog_fingerprint(model_dir)
+    cache_path = FilipinoFoodNER(base_model=model_dir, cache_dir=str(tmp_path / "cache")).cached_pipeline_path()
+    assert catalog_fingerprint(model_dir) == before
+
+    # A retrain rewrites the weights; a new component also changes config.cfg and meta.json
+    nlp = spacy.blank("en")
+    nlp.add_pipe("ner").add_label("FILIPINO_FOOD")
+    nlp.initialize()
+    nlp.to_disk(model_dir)
+    assert catalog_fingerprint(model_dir) != before
+    assert FilipinoFoodNER(base_model=model_dir, cache_dir=str(tmp_path / "cache")).cached_pipeline_path() != cache_path
+
+
+def test_touching_weights_alone_changes_the_fingerprint(tmp_path):
+    model_dir = tmp_path / "model"
+    spacy.blank("en").to_disk(model_dir)
+    before = catalog_fingerprint(str(model_dir))
+    vocab_file = model_dir / "vocab" / "strings.json"
+    stat = vocab_file.stat()
+    os.utime(vocab_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert catalog_fingerprint(str(model_dir)) != before
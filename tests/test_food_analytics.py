@@ -0,0 +1,51 @@
+import json
+import random
+import pytest
+from food_analytics import FoodAnalytics, main
+
+FOODS = ["Adobo", "Sinigang", "Lechon", "Sisig", "Kare-kare", "Pancit"]
+
+
+def random_docs(n_docs=300, seed=0):
+    rng = random.Random(seed)
+    weights = [30, 20, 10, 5, 3, 1]
+    for day in range(n_docs):
+        foods = rng.choices(FOODS, weights=weights, k=rng.randint(1, 4))
+        yield foods, f"2026-{day % 3 + 1:02d}-15"
+
+
+def test_sketch_mode_matches_exact_counts():
+    exact = FoodAnalytics(foods=FOODS, window="month")
+    sketch = FoodAnalytics(foods=FOODS, window="month", sketch=True)
+    assert exact.exact and not sketch.exact
+    for foods, timestamp in random_docs():
+        exact.add(foods, timestamp)
+        sketch.add(foods, timestamp)
+
+    for food in FOODS:
+        assert sketch.count(food) >= exact.count(food)
+    assert [food for food, _ in sketch.top_foods(3)] == [food for food, _ in exact.top_foods(3)]
+    assert sketch.top_pairs(3)[0] == exact.top_pairs(3)[0]
+    assert sketch.pair_count("Adobo", "Sinigang") >= exact.pair_count("Sinigang", "Adobo")
+    assert list(sketch.top_per_window(2)) == list(exact.top_per_window(2)) == ["2026-01", "2026-02", "2026-03"]
+    assert sketch.summary()["mode"] == "sketch"
+
+
+def test_cli_sketch_flag_on_tagged_file(tmp_path):
+    tagged = tmp_path / "tagged.jsonl"
+    with open(tagged, "w", encoding="utf-8") as f:
+        for index, (foods, _) in enumerate(random_docs(50)):
+            entities = [{"text": food, "label": "FILIPINO_FOOD", "start": 0, "end": len(food)} for food in foods]
+            f.write(json.dumps({"id": index, "entities": entities}) + "\n")
+    exact = main([str(tagged), "--tagged"])
+    sketch = main([str(tagged), "--tagged", "--sketch"])
+    assert (exact["mode"], sketch["mode"]) == ("exact", "sketch")
+    assert sketch["docs"] == exact["docs"] == 50
+    assert sketch["top_foods"][0] == exact["top_foods"][0]
+
+
+def test_cli_rejects_time_field_with_tagged_input(tmp_path):
+    tagged = tmp_path / "tagged.jsonl"
+    tagged.write_text("")
+    with pytest.raises(SystemExit):
+        main([str(tagged), "--tagged", "--time-field", "created_at"])
@@ -0,0 +1,37 @@
+import pytest
+from filipino_food_config import FilipinoFoodNER
+from food_extractor import FoodExtractor, ruler_food_spans
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return FoodExtractor()
+
+
+@pytest.mark.parametrize("text", [
+    "adobo_sinigang",
+    "_adobo_ for lunch",
+    "pancit_canton",
+    "I love adobo_",
+    "halo-\nhalo",
+    "halo -\nhalo",
+    "Kinilaw-\nnext line",
+    "halo  halo",
+    "sinigang na  baboy",
+    "halo\thalo",
+    "Adobo\tand\tsinigang",
+    "halo\nhalo",
+    "halo -halo",
+    "halo- halo",
+    "halo - halo",
+    "Halo-halo, lechon kawali and Sinigang na baboy.",
+])
+def test_extractor_matches_entity_ruler(ruler_nlp, extractor, text):
+    assert extractor.extract(text) == next(ruler_food_spans(ruler_nlp, [text]))
+
+
+def test_extractor_matches_entity_ruler_on_evaluation_sentences(ruler_nlp, extractor):
+    ner_model = FilipinoFoodNER(cache_dir=None)
+    food_sentences, non_food_sentences = ner_model.get_evaluation_sentences()
+    texts = food_sentences + non_food_sentences + ner_model.get_sample_texts()
+    assert list(extractor.extract_many(texts)) == list(ruler_food_spans(ruler_nlp, texts))
@@ -0,0 +1,38 @@
+import json
+import pytest
+from food_index import FoodIndex, index_tagged_file
+
+
+def write_tagged(path, records, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        for doc_id, foods in records:
+            entities = [{"text": food, "label": "FILIPINO_FOOD", "start": 0, "end": len(food)} for food in foods]
+            f.write(json.dumps({"id": doc_id, "entities": entities}) + "\n")
+
+
+def test_adding_the_same_file_twice_does_not_duplicate_documents(tmp_path):
+    tagged = tmp_path / "tagged.jsonl"
+    write_tagged(tagged, [("a", ["Sisig", "Adobo"]), ("b", ["Sisig"]), ("c", ["Halo-halo"])])
+    index_path = str(tmp_path / "index")
+
+    index_tagged_file(str(tagged), index_path, segment_size=2)
+    index_tagged_file(str(tagged), index_path, segment_size=2)
+    index = FoodIndex(index_path)
+    assert index.doc_count == 3
+    assert len(index.query("Sisig")) == 2
+
+    write_tagged(tagged, [("d", ["Sisig"])], mode="a")
+    index_tagged_file(str(tagged), index_path)
+    index = FoodIndex(index_path)
+    assert index.doc_count == 4
+    assert [doc_id for doc_id, _ in index.search("Sisig")] == ["a", "b", "d"]
+
+
+def test_shrunken_file_is_rejected(tmp_path):
+    tagged = tmp_path / "tagged.jsonl"
+    write_tagged(tagged, [("a", ["Sisig"]), ("b", ["Adobo"])])
+    index_path = str(tmp_path / "index")
+    index_tagged_file(str(tagged), index_path)
+    write_tagged(tagged, [("a", ["Sisig"])])
+    with pytest.raises(ValueError):
+        index_tagged_file(str(tagged), index_path)
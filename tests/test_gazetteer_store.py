@@ -0,0 +1,47 @@
+import shutil
+import spacy
+from filipino_food_config import iter_canonical_foods
+from gazetteer_store import Gazetteer, build_gazetteer
+
+
+def food_ents(nlp, text):
+    return [(ent.text, ent.label_, ent.ent_id_) for ent in nlp(text).ents]
+
+
+def test_saved_pipeline_loads_without_source_gazetteer(tmp_path):
+    source = tmp_path / "source_gazetteer"
+    build_gazetteer(iter_canonical_foods(), str(source))
+    nlp = spacy.blank("en")
+    nlp.add_pipe("food_gazetteer", config={"path": str(source)})
+    text = "We had lechon-kawali and Sinigang na baboy for lunch."
+    expected = food_ents(nlp, text)
+    assert expected
+
+    saved = tmp_path / "pipeline"
+    nlp.to_disk(saved)
+    shutil.rmtree(source)
+    assert food_ents(spacy.load(saved), text) == expected
+
+
+def test_relative_gazetteer_path_from_other_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    build_gazetteer(iter_canonical_foods(), "relative_gazetteer")
+    nlp = spacy.blank("en")
+    nlp.add_pipe("food_gazetteer", config={"path": "relative_gazetteer"})
+    nlp.to_disk(tmp_path / "pipeline")
+
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+    assert food_ents(spacy.load(tmp_path / "pipeline"), "Halo-halo please") == [
+        ("Halo-halo", "FILIPINO_FOOD", "Halo-halo")
+    ]
+
+
+def test_lookup_punctuated_names(tmp_path):
+    names = ["Mang Inasal (Large)", "Pork BBQ, 3pcs"]
+    build_gazetteer([(name, name) for name in names], str(tmp_path / "gazetteer"))
+    gazetteer = Gazetteer(str(tmp_path / "gazetteer"))
+    for name in names:
+        assert gazetteer.lookup(name) == name
+    assert gazetteer.lookup("pork  bbq , 3pcs") == "Pork BBQ, 3pcs"
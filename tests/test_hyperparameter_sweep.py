@@ -0,0 +1,19 @@
+import os
+from hyperparameter_sweep import run_sweep
+
+
+def test_rerun_retrains_candidates_and_restores_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("OMP_NUM_THREADS", "7")
+    monkeypatch.delenv("MKL_NUM_THREADS", raising=False)
+    stale_model = tmp_path / "candidate-000"
+    stale_model.mkdir()
+    (stale_model / "stale").write_text("left over from an earlier sweep")
+
+    results = run_sweep([{"iterations": 1, "batch_size": 8, "dropout": 0.2}], trainer="docbin",
+                        output_dir=str(tmp_path), n_workers=1, seed=3)
+
+    assert len(results) == 1
+    assert not (stale_model / "stale").exists()
+    assert (stale_model / "meta.json").exists()
+    assert os.environ["OMP_NUM_THREADS"] == "7"
+    assert "MKL_NUM_THREADS" not in os.environ
@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+from ner_model import run_training
+
+
+class RecordingNLP:
+    """Stands in for a pipeline and records the size of every update's batch, per epoch."""
+
+    def __init__(self):
+        self.epochs = []
+
+    def update(self, batch, sgd=None, drop=0.0, losses=None):
+        self.epochs[-1].append(len(batch))
+
+
+def test_compounding_batch_sizes_grow_across_epochs():
+    nlp = RecordingNLP()
+    examples = [SimpleNamespace(reference=["token"]) for _ in range(200)]
+
+    def epoch_examples():
+        nlp.epochs.append([])
+        return examples
+
+    run_training(nlp, optimizer=None, epoch_examples=epoch_examples, n_iter=20)
+    first, last = nlp.epochs[0], nlp.epochs[-1]
+    assert first[0] == 4
+    assert min(last) > max(first)
+    assert max(last) <= 32
@@ -0,0 +1,35 @@
+import spacy
+from spacy.language import Language
+from ner_service import MicroBatcher
+
+BATCH_SIZES = []
+
+
+class BatchRecorder:
+    def __call__(self, doc):
+        BATCH_SIZES.append(1)
+        return doc
+
+    def pipe(self, docs, batch_size=128):
+        for batch in spacy.util.minibatch(docs, batch_size):
+            BATCH_SIZES.append(len(batch))
+            yield from batch
+
+
+@Language.factory("batch_recorder")
+def create_batch_recorder(nlp, name):
+    return BatchRecorder()
+
+
+def test_large_request_is_split_into_max_batch_size_chunks(ruler_nlp):
+    ruler_nlp.add_pipe("batch_recorder")
+    batcher = MicroBatcher(ruler_nlp, max_batch_size=8, max_wait_ms=1.0)
+    try:
+        texts = [f"Adobo number {i}" for i in range(50)]
+        results = batcher.submit(texts).result(timeout=10)
+    finally:
+        batcher.close()
+    assert len(results) == 50
+    assert all(result[0]["text"] == "Adobo" for result in results)
+    assert max(BATCH_SIZES) <= 8
+    assert sum(BATCH_SIZES) == 50
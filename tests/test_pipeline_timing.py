@@ -0,0 +1,25 @@
+from spacy.language import Language
+from pipeline_timing import PipelineTimer
+
+
+@Language.component("tag_marker")
+def tag_marker(doc, marker="default"):
+    doc.user_data["marker"] = marker
+    return doc
+
+
+def test_pipe_honors_disable(ruler_nlp):
+    timer = PipelineTimer(ruler_nlp)
+    docs = list(timer.pipe(["Adobo tonight"], disable=["entity_ruler"]))
+    assert docs[0].ents == ()
+    assert "entity_ruler" not in timer.last()["components_ms"]
+    assert [ent.text for ent in timer("Adobo tonight").ents] == ["Adobo"]
+    assert timer("Adobo tonight", disable=["entity_ruler"]).ents == ()
+
+
+def test_pipe_passes_component_cfg(ruler_nlp):
+    timer = PipelineTimer(ruler_nlp)
+    timer.nlp.add_pipe("tag_marker")
+    docs = list(timer.pipe(["Sisig"], component_cfg={"tag_marker": {"marker": "custom"}}))
+    assert docs[0].user_data["marker"] == "custom"
+    assert next(timer.pipe(["Sisig"])).user_data["marker"] == "default"
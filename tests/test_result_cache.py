@@ -0,0 +1,79 @@
+import json
+import sqlite3
+from result_cache import ResultCache
+
+
+def stored_sizes(path):
+    conn = sqlite3.connect(path)
+    try:
+        total = conn.execute("SELECT COALESCE(SUM(total), 0) FROM cache_size").fetchone()[0]
+        actual = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+    finally:
+        conn.close()
+    return total, actual
+
+
+def entities(n):
+    return [{"text": "Adobo", "label": "FILIPINO_FOOD", "start": i, "end": i + 5} for i in range(n)]
+
+
+def test_running_total_tracks_inserts_replacements_and_evictions(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path, "fp", max_mb=0.01)
+    cache.put_many((f"text {i}", entities(1)) for i in range(20))
+    cache.put_many([("text 3", entities(5))])
+    total, actual = stored_sizes(path)
+    assert total == actual > 0
+    assert cache.get_many(["text 3"]) == {0: entities(5)}
+
+    cache.put_many((f"more {i}", entities(10)) for i in range(50))
+    total, actual = stored_sizes(path)
+    assert total == actual <= cache.max_bytes
+    cache.clear()
+    assert stored_sizes(path) == (0, 0)
+    cache.close()
+
+
+def test_existing_cache_without_size_table_is_summed_on_open(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path, "fp")
+    cache.put_many([("a", entities(2)), ("b", entities(3))])
+    cache.close()
+    conn = sqlite3.connect(path)
+    for trigger in ("results_size_insert", "results_size_update", "results_size_delete"):
+        conn.execute(f"DROP TRIGGER {trigger}")
+    conn.execute("DROP TABLE cache_size")
+    conn.commit()
+    conn.close()
+
+    cache = ResultCache(path, "fp")
+    total, actual = stored_sizes(path)
+    assert total == actual == cache.stats()["bytes"]
+    cache.close()
+
+
+def test_stats_are_per_fingerprint_and_survive_old_size_table(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path, "old")
+    cache.put_many([("a", entities(2)), ("b", entities(3))])
+    cache.close()
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE cache_size")
+    conn.execute("CREATE TABLE cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)")
+    conn.execute("INSERT INTO cache_size VALUES (0, (SELECT SUM(size) FROM results))")
+    conn.commit()
+    conn.close()
+
+    old = ResultCache(path, "old")
+    new = ResultCache(path, "new")
+    new.put_many([("a", entities(1))])
+    old.put_many([("a", entities(4))])
+    new_bytes = len(json.dumps(entities(1)))
+    assert new.stats()["entries"] == 1 and new.stats()["bytes"] == new_bytes
+    assert old.stats()["entries"] == 2
+    total, actual = stored_sizes(path)
+    assert total == actual == old.stats()["bytes"] + new_bytes
+    old.clear()
+    assert new.stats()["entries"] == old.stats()["entries"] == 0
+    old.close()
+    new.close()
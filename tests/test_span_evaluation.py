@@ -0,0 +1,18 @@
+import csv
+import os
+from span_evaluation import evaluate_spans
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_per_food_csv_keeps_results_file_columns(ruler_nlp, tmp_path):
+    gold = [("I love Adobo and halo-halo.", {"entities": [(7, 12, "FILIPINO_FOOD"), (17, 26, "FILIPINO_FOOD")]})]
+    path = tmp_path / "per_food.csv"
+    evaluate_spans(ruler_nlp, gold).write_per_food_csv(str(path))
+
+    with open(os.path.join(REPO_DIR, "filipino_food_test_results.csv"), newline="", encoding="utf-8") as f:
+        expected_header = next(csv.reader(f))
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == expected_header
+    assert ["Adobo", "1", "1", "1.0"] in rows
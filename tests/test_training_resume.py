@@ -0,0 +1,65 @@
+import json
+import spacy
+from filipino_food_config import FilipinoFoodNER
+
+TRAIN = [("I love Adobo.", {"entities": [(7, 12, "FILIPINO_FOOD")]}),
+         ("Sinigang for lunch.", {"entities": [(0, 8, "FILIPINO_FOOD")]}),
+         ("We ate Lechon today.", {"entities": [(7, 13, "FILIPINO_FOOD")]})] * 4
+# No gold entities, so the dev score never improves after the first evaluation
+DEV = [("The weather is nice.", {"entities": []})]
+
+
+def read_state(output_dir):
+    with open(f"{output_dir}_checkpoint/training_state.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def train(base_model, output_dir, **kwargs):
+    ner_model = FilipinoFoodNER(base_model=base_model, cache_dir=None)
+    return ner_model.train_custom_model(TRAIN, iterations=10, output_dir=output_dir, dev_data=DEV,
+                                        eval_every=1, patience=2, batch_size=4, **kwargs)
+
+
+def test_resume_after_early_stop_does_not_train_again(tmp_path):
+    base_model = str(tmp_path / "blank")
+    spacy.blank("en").to_disk(base_model)
+    output_dir = str(tmp_path / "model")
+
+    train(base_model, output_dir)
+    stopped = read_state(output_dir)
+    assert stopped["finished"] == "early_stopped"
+    assert stopped["bad_evals"] == 2 and stopped["step"] == 3
+
+    nlp = train(base_model, output_dir, resume=True)
+    assert "ner" in nlp.pipe_names
+    assert read_state(output_dir) == stopped
+
+
+def test_resume_keeps_best_score_and_patience_counter(tmp_path):
+    base_model = str(tmp_path / "blank")
+    spacy.blank("en").to_disk(base_model)
+    output_dir = str(tmp_path / "model")
+
+    train(base_model, output_dir)
+    # Pretend the run was interrupted right after its second evaluation
+    state = read_state(output_dir)
+    state.update({"finished": None, "bad_evals": 1, "step": 2, "batches_done": 2, "history": state["history"][:2]})
+    with open(f"{output_dir}_checkpoint/training_state.json", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+    train(base_model, output_dir, resume=True)
+    resumed = read_state(output_dir)
+    assert resumed["finished"] == "early_stopped"
+    # One more evaluation without improvement uses up the remaining patience
+    assert resumed["step"] == 3 and resumed["bad_evals"] == 2
+    assert resumed["best_score"] == state["best_score"]
+
+
+def test_resume_without_checkpoint_trains_from_scratch(tmp_path):
+    base_model = str(tmp_path / "blank")
+    spacy.blank("en").to_disk(base_model)
+    output_dir = str(tmp_path / "model")
+
+    nlp = train(base_model, output_dir, resume=True)
+    assert "ner" in nlp.pipe_names
+    assert read_state(output_dir)["finished"] == "early_stopped"
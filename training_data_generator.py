@@ -0,0 +1,176 @@
+# training_data_generator.py
+import argparse
+import json
+import os
+import random
+from spacy.tokens import DocBin
+from corpus_builder import map_shards, worker_nlp
+from filipino_food_config import iter_canonical_foods
+from ner_model import iter_shard_paths, make_annotated_doc
+
+# "{food}" slots are filled with dish names; templates with one slot or several
+FOOD_TEMPLATES = [
+    "I love eating {food}.",
+    "My favorite dish is {food}.",
+    "We had {food} at the party.",
+    "{food} is a traditional Filipino dish.",
+    "I ordered {food} and {food} for dinner.",
+    "The restaurant serves delicious {food}.",
+    "My grandmother makes the best {food}.",
+    "For breakfast, I had {food} with garlic rice.",
+    "The {food} was so good, we ordered more.",
+    "Have you ever tried {food}?",
+    "Nothing beats a bowl of {food} on a rainy day.",
+    "The street vendor sells {food} and {food}.",
+    "Their {food} tastes just like my lola's.",
+    "We brought {food}, {food} and {food} to the potluck.",
+    "Is the {food} here any good?",
+    "Kumain kami ng {food} kahapon.",
+    "Masarap ang {food} dito!",
+    "The menu lists {food} for 250 pesos.",
+    "{food} pairs well with {food}.",
+    "After the fiesta, only the {food} was left.",
+]
+
+# Sentences with no Filipino food, so the model also learns when not to fire
+NEGATIVE_TEMPLATES = [
+    "I went to the store today.",
+    "John works at Microsoft in Manila.",
+    "The meeting is on {day}.",
+    "Pizza and pasta for dinner again.",
+    "I love sushi and ramen.",
+    "Coffee and donuts this morning.",
+    "The traffic on EDSA was terrible on {day}.",
+    "Maria lives in Cebu.",
+    "The weather is nice for a walk.",
+    "We watched a movie after work.",
+    "The burger place opens at {hour} AM.",
+    "She ordered a salad and iced tea.",
+    "Our flight to Davao leaves on {day}.",
+    "I paid 500 pesos for the taxi.",
+]
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def add_noise(food, rng, noise=0.3):
+    """
+    Randomly re-case and re-hyphenate a food name ("Halo-halo" -> "halo halo", "HALO-HALO"...).
+    The returned string is still matched by the case-insensitive food patterns.
+    """
+    if rng.random() >= noise:
+        return food
+    choice = rng.random()
+    if choice < 0.3:
+        food = food.lower()
+    elif choice < 0.45:
+        food = food.upper()
+    elif choice < 0.6:
+        food = food.title()
+    if "-" in food and rng.random() < 0.5:
+        food = food.replace("-", " ")
+    elif " " in food and rng.random() < 0.2:
+        food = food.replace(" ", "-")
+    return food
+
+
+def generate_example(rng, foods, negative_ratio=0.2, noise=0.3):
+    """
+    Build one {"text", "entities"} example. Offsets are computed while the
+    template is filled, so they are always correct.
+    """
+    if rng.random() < negative_ratio:
+        template = rng.choice(NEGATIVE_TEMPLATES)
+        return {"text": template.format(day=rng.choice(DAYS), hour=rng.randint(6, 11)), "entities": []}
+
+    template = rng.choice(FOOD_TEMPLATES)
+    pieces = template.split("{food}")
+    text = pieces[0]
+    entities = []
+    for piece in pieces[1:]:
+        surface, _ = rng.choice(foods)
+        food = add_noise(surface, rng, noise)
+        # Capitalize dishes that start a sentence, as a writer would
+        if not text and food.islower():
+            food = food[0].upper() + food[1:]
+        entities.append([len(text), len(text) + len(food), "FILIPINO_FOOD"])
+        text += food + piece
+    return {"text": text, "entities": entities}
+
+
+def generate_examples(n_examples, seed=0, negative_ratio=0.2, noise=0.3, foods=None):
+    """Yield n_examples deterministic examples for a given seed."""
+    rng = random.Random(seed)
+    foods = foods or list(iter_canonical_foods())
+    for _ in range(n_examples):
+        yield generate_example(rng, foods, negative_ratio, noise)
+
+
+def shard_seed(seed, shard_index):
+    """Independent, reproducible seed per shard so output doesn't depend on the number of workers."""
+    return seed * 1_000_003 + shard_index
+
+
+def write_shard(shard_path, n_examples, seed, negative_ratio=0.2, noise=0.3):
+    """Generate one shard straight into a DocBin file; returns (shard_path, n_examples, n_entities)."""
+    nlp = worker_nlp()
+    doc_bin = DocBin()
+    n_entities = 0
+    for example in generate_examples(n_examples, seed, negative_ratio, noise):
+        doc, _ = make_annotated_doc(nlp, example["text"], example["entities"])
+        n_entities += len(doc.ents)
+        doc_bin.add(doc)
+    doc_bin.to_disk(shard_path)
+    return shard_path, n_examples, n_entities
+
+
+def generate_shards(output_dir, n_examples, shard_size=50000, n_process=1, seed=0, negative_ratio=0.2, noise=0.3):
+    """
+    Write n_examples synthetic examples as .spacy shards ready for ner_model.train_from_shards().
+    Each shard is generated and saved by one worker and at most 2 * n_process
+    shards are in flight, so memory stays bounded by the shard size.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if iter_shard_paths(output_dir):
+        raise ValueError(f"'{output_dir}' already contains .spacy shards; use an empty directory")
+
+    tasks = []
+    for shard_index, start in enumerate(range(0, n_examples, shard_size)):
+        shard_path = os.path.join(output_dir, f"shard-{shard_index:05d}.spacy")
+        tasks.append((shard_path, min(shard_size, n_examples - start), shard_seed(seed, shard_index), negative_ratio, noise))
+
+    totals = {"shards": 0, "examples": 0, "entities": 0}
+    for shard_path, count, n_entities in map_shards(write_shard, tasks, n_process):
+        totals["shards"] += 1
+        totals["examples"] += count
+        totals["entities"] += n_entities
+        print(f"Wrote {shard_path} ({count} examples, {n_entities} entities)")
+
+    print(f"Generated {totals['examples']} examples ({totals['entities']} entities) in {totals['shards']} shards")
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Filipino food NER training data.")
+    parser.add_argument("output", help="Output directory for .spacy shards, or a .jsonl file with --jsonl")
+    parser.add_argument("-n", "--n-examples", type=int, default=100000)
+    parser.add_argument("--shard-size", type=int, default=50000)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--negative-ratio", type=float, default=0.2, help="Share of sentences without food")
+    parser.add_argument("--noise", type=float, default=0.3, help="Share of food names with casing/hyphen noise")
+    parser.add_argument("--jsonl", action="store_true", help="Write {text, entities} JSONL instead of DocBin shards")
+    args = parser.parse_args(argv)
+
+    if args.jsonl:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for example in generate_examples(args.n_examples, args.seed, args.negative_ratio, args.noise):
+                f.write(json.dumps(example, ensure_ascii=False) + "\n")
+        print(f"Wrote {args.n_examples} examples to {args.output}")
+    else:
+        generate_shards(args.output, args.n_examples, args.shard_size, args.n_process,
+                        args.seed, args.negative_ratio, args.noise)
+
+
+if __name__ == "__main__":
+    main()